@@ -0,0 +1,107 @@
+"""Shared fixtures of the step, reset and constructor benchmarks, requires `pytest-benchmark`.
+
+The benchmark results are saved as JSON baselines with `pytest benchmarks --benchmark-autosave`
+and later runs are compared against the latest baseline with
+`pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%`.
+"""
+
+from __future__ import annotations
+
+import tracemalloc
+from typing import Any, Callable
+
+import gymnasium as gym
+import pytest
+
+import shimmy
+
+gym.register_envs(shimmy)
+
+
+def allocated_bytes_per_step(step: Callable[[], Any], num_steps: int = 100) -> float:
+    """Returns the mean peak memory allocated during a step in bytes, measured with `tracemalloc`.
+
+    Args:
+        step: The function taking a step in the environment
+        num_steps: The number of steps to measure
+
+    Returns:
+        The mean allocated bytes per step
+    """
+    # the first step can allocate caches, e.g., the observation buffers
+    step()
+
+    tracemalloc.start()
+    try:
+        allocated_bytes = 0
+        for _ in range(num_steps):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            step()
+            allocated_bytes += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return allocated_bytes / num_steps
+
+
+@pytest.fixture
+def gymnasium_step_fn():
+    """Returns a function making the step function of a gymnasium environment with a constant action, resetting the environment at the end of episodes."""
+
+    def _gymnasium_step_fn(env: gym.Env, seed: int = 42) -> Callable[[], None]:
+        env.reset(seed=seed)
+        env.action_space.seed(seed)
+        action = env.action_space.sample()
+
+        def step():
+            _, _, terminated, truncated, _ = env.step(action)
+            if terminated or truncated:
+                env.reset()
+
+        return step
+
+    return _gymnasium_step_fn
+
+
+@pytest.fixture
+def step_benchmark(benchmark):
+    """Benchmarks a step function, recording the steps per second and the allocated bytes per step in the JSON results."""
+
+    def _step_benchmark(step: Callable[[], Any]):
+        benchmark.extra_info["allocated_bytes_per_step"] = allocated_bytes_per_step(
+            step
+        )
+        benchmark(step)
+        # without statistics if the benchmarks are disabled with `--benchmark-disable`
+        if benchmark.stats is not None:
+            benchmark.extra_info["steps_per_second"] = 1 / benchmark.stats.stats.mean
+
+    return _step_benchmark
+
+
+@pytest.fixture
+def reset_benchmark(benchmark):
+    """Benchmarks the reset latency of an environment."""
+
+    def _reset_benchmark(reset: Callable[[], Any]):
+        benchmark(reset)
+        # without statistics if the benchmarks are disabled with `--benchmark-disable`
+        if benchmark.stats is not None:
+            benchmark.extra_info["resets_per_second"] = 1 / benchmark.stats.stats.mean
+
+    return _reset_benchmark
+
+
+@pytest.fixture
+def constructor_benchmark(benchmark):
+    """Benchmarks the constructor latency of an environment, including closing the environment.
+
+    As constructing the larger environments takes seconds, the constructor is only timed for a few rounds.
+    """
+
+    def _constructor_benchmark(make_env: Callable[[], Any], rounds: int = 3):
+        benchmark.pedantic(
+            lambda: make_env().close(), rounds=rounds, iterations=1, warmup_rounds=1
+        )
+
+    return _constructor_benchmark
@@ -0,0 +1,40 @@
+"""Benchmarks the step, reset and constructor of the dm-control suite, locomotion and manipulation environments."""
+
+import gymnasium as gym
+import pytest
+
+DM_CONTROL_ENV_IDS = [
+    "dm_control/cartpole-balance-v0",
+    "dm_control/walker-walk-v0",
+    "dm_control/humanoid-run-v0",
+    "dm_control/CmuHumanoidRunGaps-v0",
+    "dm_control/RodentEscapeBowl-v0",
+    "dm_control/reach_site_features-v0",
+    "dm_control/lift_brick_features-v0",
+]
+
+
+@pytest.mark.benchmark(group="dm_control-step")
+@pytest.mark.parametrize("env_id", DM_CONTROL_ENV_IDS)
+def test_step(env_id, step_benchmark, gymnasium_step_fn):
+    """Benchmarks the steps per second and allocated bytes per step."""
+    env = gym.make(env_id)
+    step_benchmark(gymnasium_step_fn(env))
+    env.close()
+
+
+@pytest.mark.benchmark(group="dm_control-reset")
+@pytest.mark.parametrize("env_id", DM_CONTROL_ENV_IDS)
+def test_reset(env_id, reset_benchmark):
+    """Benchmarks the reset latency."""
+    env = gym.make(env_id)
+    env.reset(seed=42)
+    reset_benchmark(env.reset)
+    env.close()
+
+
+@pytest.mark.benchmark(group="dm_control-constructor")
+@pytest.mark.parametrize("env_id", DM_CONTROL_ENV_IDS)
+def test_constructor(env_id, constructor_benchmark):
+    """Benchmarks the constructor latency."""
+    constructor_benchmark(lambda: gym.make(env_id))
@@ -0,0 +1,62 @@
+"""Benchmarks the step, reset and constructor of the multi-agent dm-control soccer environments."""
+
+import pytest
+from dm_control.locomotion import soccer as dm_soccer
+
+from shimmy.dm_control_multiagent_compatibility import (
+    DmControlMultiAgentCompatibilityV0,
+)
+from shimmy.utils.dm_control_multiagent import load_dm_control_soccer
+
+SOCCER_CONFIGS = [
+    (1, dm_soccer.WalkerType.BOXHEAD),
+    (2, dm_soccer.WalkerType.BOXHEAD),
+    (2, dm_soccer.WalkerType.ANT),
+]
+
+
+def _make_env(team_size, walker_type, **kwargs):
+    return DmControlMultiAgentCompatibilityV0(
+        load_dm_control_soccer(team_size=team_size, walker_type=walker_type),
+        **kwargs,
+    )
+
+
+@pytest.mark.benchmark(group="dm_control_multi_agent-step")
+@pytest.mark.parametrize("team_size, walker_type", SOCCER_CONFIGS)
+@pytest.mark.parametrize("persistent_step_containers", [False, True])
+def test_step(team_size, walker_type, persistent_step_containers, step_benchmark):
+    """Benchmarks the parallel steps per second and allocated bytes per step."""
+    env = _make_env(
+        team_size, walker_type, persistent_step_containers=persistent_step_containers
+    )
+    env.reset(seed=42)
+    actions = {}
+    for agent in env.possible_agents:
+        env.action_space(agent).seed(42)
+        actions[agent] = env.action_space(agent).sample()
+
+    def step():
+        env.step(actions)
+        if not env.agents:
+            env.reset()
+
+    step_benchmark(step)
+    env.close()
+
+
+@pytest.mark.benchmark(group="dm_control_multi_agent-reset")
+@pytest.mark.parametrize("team_size, walker_type", SOCCER_CONFIGS)
+def test_reset(team_size, walker_type, reset_benchmark):
+    """Benchmarks the reset latency."""
+    env = _make_env(team_size, walker_type)
+    env.reset(seed=42)
+    reset_benchmark(env.reset)
+    env.close()
+
+
+@pytest.mark.benchmark(group="dm_control_multi_agent-constructor")
+@pytest.mark.parametrize("team_size, walker_type", SOCCER_CONFIGS)
+def test_constructor(team_size, walker_type, constructor_benchmark):
+    """Benchmarks the constructor latency."""
+    constructor_benchmark(lambda: _make_env(team_size, walker_type))
@@ -0,0 +1,41 @@
+"""Benchmarks the step, reset and constructor of the gym v21 and v26 classic control environments."""
+
+import gymnasium as gym
+import pytest
+
+pytest.importorskip("gym")
+
+GYM_ENVS = [
+    ("GymV21Environment-v0", "CartPole-v1"),
+    ("GymV21Environment-v0", "Acrobot-v1"),
+    ("GymV26Environment-v0", "CartPole-v1"),
+    ("GymV26Environment-v0", "Acrobot-v1"),
+]
+
+
+@pytest.mark.benchmark(group="gym-step")
+@pytest.mark.parametrize("compatibility_env_id, env_id", GYM_ENVS)
+def test_step(compatibility_env_id, env_id, step_benchmark, gymnasium_step_fn):
+    """Benchmarks the steps per second and allocated bytes per step."""
+    env = gym.make(compatibility_env_id, env_id=env_id)
+    step_benchmark(gymnasium_step_fn(env))
+    env.close()
+
+
+@pytest.mark.benchmark(group="gym-reset")
+@pytest.mark.parametrize("compatibility_env_id, env_id", GYM_ENVS)
+def test_reset(compatibility_env_id, env_id, reset_benchmark):
+    """Benchmarks the reset latency."""
+    env = gym.make(compatibility_env_id, env_id=env_id)
+    env.reset(seed=42)
+    reset_benchmark(env.reset)
+    env.close()
+
+
+@pytest.mark.benchmark(group="gym-constructor")
+@pytest.mark.parametrize("compatibility_env_id, env_id", GYM_ENVS)
+def test_constructor(compatibility_env_id, env_id, constructor_benchmark):
+    """Benchmarks the constructor latency."""
+    constructor_benchmark(
+        lambda: gym.make(compatibility_env_id, env_id=env_id), rounds=10
+    )
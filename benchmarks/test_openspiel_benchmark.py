@@ -0,0 +1,71 @@
+"""Benchmarks the step, reset and constructor of OpenSpiel games."""
+
+import numpy as np
+import pyspiel
+import pytest
+
+from shimmy.openspiel_compatibility import OpenSpielCompatibilityV0
+from shimmy.openspiel_vector_env import OpenSpielVectorEnvV0
+
+GAME_NAMES = ["chess", "leduc_poker", "goofspiel"]
+
+
+@pytest.mark.benchmark(group="openspiel-step")
+@pytest.mark.parametrize("game_name", GAME_NAMES)
+def test_step(game_name, step_benchmark):
+    """Benchmarks the agent steps per second with random legal actions and allocated bytes per step."""
+    env = OpenSpielCompatibilityV0(pyspiel.load_game(game_name))
+    env.reset(seed=42)
+    for agent in env.possible_agents:
+        env.action_space(agent).seed(42)
+
+    def step():
+        agent = env.agent_selection
+        if env.terminations[agent] or env.truncations[agent]:
+            env.step(None)
+        else:
+            action_mask = env.infos[agent]["action_mask"]
+            env.step(env.action_space(agent).sample(action_mask))
+        if not env.agents:
+            env.reset()
+
+    step_benchmark(step)
+    env.close()
+
+
+@pytest.mark.benchmark(group="openspiel-reset")
+@pytest.mark.parametrize("game_name", GAME_NAMES)
+def test_reset(game_name, reset_benchmark):
+    """Benchmarks the reset latency."""
+    env = OpenSpielCompatibilityV0(pyspiel.load_game(game_name))
+    env.reset(seed=42)
+    reset_benchmark(env.reset)
+    env.close()
+
+
+@pytest.mark.benchmark(group="openspiel-constructor")
+@pytest.mark.parametrize("game_name", GAME_NAMES)
+def test_constructor(game_name, constructor_benchmark):
+    """Benchmarks the constructor latency, including loading the game."""
+    constructor_benchmark(
+        lambda: OpenSpielCompatibilityV0(pyspiel.load_game(game_name)), rounds=10
+    )
+
+
+@pytest.mark.benchmark(group="openspiel-vector-step")
+@pytest.mark.parametrize("game_name", ["chess", "leduc_poker"])
+def test_vector_step(game_name, step_benchmark):
+    """Benchmarks the batched steps per second of 64 games, with random legal actions, and allocated bytes per batched step."""
+    envs = OpenSpielVectorEnvV0(game_name=game_name, num_envs=64, copy=False)
+    _, info = envs.reset(seed=42)
+    rng = np.random.default_rng(42)
+    actions = np.zeros(envs.num_envs, dtype=np.int64)
+
+    def step():
+        for i, action_mask in enumerate(info["action_mask"]):
+            legal_actions = np.flatnonzero(action_mask)
+            actions[i] = rng.choice(legal_actions) if len(legal_actions) else 0
+        envs.step(actions)
+
+    step_benchmark(step)
+    envs.close()
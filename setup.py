@@ -47,6 +47,7 @@ extras = {
     "openspiel": ["open_spiel>=1.2", "pettingzoo>=1.23"],
     "testing": [
         "pytest>=7.1.3",
+        "pytest-benchmark>=4.0.0",
         "pillow>=9.3.0",
     ],
 }
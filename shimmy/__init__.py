@@ -2,11 +2,25 @@
 
 from __future__ import annotations
 
-from typing import Any
+import importlib
+from typing import TYPE_CHECKING, Any
 
 from shimmy.openai_gym_compatibility import GymV21CompatibilityV0, GymV26CompatibilityV0
 from shimmy.registration import register_gymnasium_envs
 
+if TYPE_CHECKING:
+    from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+    from shimmy.dm_control_env_pool import DmControlEnvPoolV0
+    from shimmy.dm_control_multiagent_compatibility import (
+        DmControlMultiAgentCompatibilityV0,
+    )
+    from shimmy.dm_control_vector_env import (
+        DmControlAsyncVectorEnvV0,
+        DmControlSuiteVectorEnvV0,
+    )
+    from shimmy.openspiel_compatibility import OpenSpielCompatibilityV0
+    from shimmy.openspiel_vector_env import OpenSpielVectorEnvV0
+
 # this registers the environments on `import shimmy`
 register_gymnasium_envs()
 
@@ -23,36 +37,62 @@ class NotInstallClass:
         raise ImportError(self.install_message) from self.import_exception
 
 
-try:
-    from shimmy.dm_control_compatibility import DmControlCompatibilityV0
-except ImportError as e:
-    DmControlCompatibilityV0 = NotInstallClass(
-        "Dm-control is not installed, run `pip install 'shimmy[dm-control]'`", e
-    )
+# The optional compatibility wrappers are only imported when first accessed, see `__getattr__`
+_OPTIONAL_CLASSES = {
+    "DmControlCompatibilityV0": (
+        "shimmy.dm_control_compatibility",
+        "Dm-control is not installed, run `pip install 'shimmy[dm-control]'`",
+    ),
+    "DmControlSuiteVectorEnvV0": (
+        "shimmy.dm_control_vector_env",
+        "Dm-control is not installed, run `pip install 'shimmy[dm-control]'`",
+    ),
+    "DmControlAsyncVectorEnvV0": (
+        "shimmy.dm_control_vector_env",
+        "Dm-control is not installed, run `pip install 'shimmy[dm-control]'`",
+    ),
+    "DmControlEnvPoolV0": (
+        "shimmy.dm_control_env_pool",
+        "Dm-control is not installed, run `pip install 'shimmy[dm-control]'`",
+    ),
+    "DmControlMultiAgentCompatibilityV0": (
+        "shimmy.dm_control_multiagent_compatibility",
+        "Dm-control or PettingZoo is not installed, run `pip install 'shimmy[dm-control-multi-agent]'`",
+    ),
+    "OpenSpielCompatibilityV0": (
+        "shimmy.openspiel_compatibility",
+        "OpenSpiel or PettingZoo is not installed, run `pip install 'shimmy[openspiel]'`",
+    ),
+    "OpenSpielVectorEnvV0": (
+        "shimmy.openspiel_vector_env",
+        "OpenSpiel or PettingZoo is not installed, run `pip install 'shimmy[openspiel]'`",
+    ),
+}
 
 
-try:
-    from shimmy.dm_control_multiagent_compatibility import (
-        DmControlMultiAgentCompatibilityV0,
-    )
-except ImportError as e:
-    DmControlMultiAgentCompatibilityV0 = NotInstallClass(
-        "Dm-control or PettingZoo is not installed, run `pip install 'shimmy[dm-control-multi-agent]'`",
-        e,
-    )
+def __getattr__(name: str) -> Any:
+    """Imports the optional compatibility wrappers on first access, such that `import shimmy` doesn't import their dependencies."""
+    if name not in _OPTIONAL_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, install_message = _OPTIONAL_CLASSES[name]
+    try:
+        value = getattr(importlib.import_module(module_name), name)
+    except ImportError as e:
+        value = NotInstallClass(install_message, e)
+
+    globals()[name] = value
+    return value
 
-try:
-    from shimmy.openspiel_compatibility import OpenSpielCompatibilityV0
-except ImportError as e:
-    OpenSpielCompatibilityV0 = NotInstallClass(
-        "OpenSpiel or PettingZoo is not installed, run `pip install 'shimmy[openspiel]'`",
-        e,
-    )
 
 __all__ = [
     "DmControlCompatibilityV0",
+    "DmControlSuiteVectorEnvV0",
+    "DmControlAsyncVectorEnvV0",
+    "DmControlEnvPoolV0",
     "DmControlMultiAgentCompatibilityV0",
     "OpenSpielCompatibilityV0",
+    "OpenSpielVectorEnvV0",
     "GymV21CompatibilityV0",
     "GymV26CompatibilityV0",
 ]
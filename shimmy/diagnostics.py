@@ -0,0 +1,179 @@
+"""Diagnostics for shimmy's optional backends.
+
+Run ``python -m shimmy.diagnostics import-cost`` to report the wall time and memory each optional backend adds
+when imported through shimmy's entry points, and which of them are imported eagerly by ``import shimmy``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Any
+
+# The optional backends as (name, shimmy modules imported by the entry points, backend modules imported by the entry points).
+# The shimmy modules are imported by the wrapper attributes, e.g., `shimmy.DmControlCompatibilityV0`, and the registered
+# entry points of `gymnasium.make`, e.g., `gymnasium.make("dm_control/...")` before constructing the environment.
+# PettingZoo has no entry point of its own, it is required by the multi-agent wrappers, such that the raw module is measured.
+OPTIONAL_BACKENDS = (
+    ("gym", ("shimmy.openai_gym_compatibility",), ("gym",)),
+    (
+        "dm_control suite",
+        ("shimmy.dm_control_compatibility", "shimmy.utils.dm_control"),
+        ("dm_control.suite",),
+    ),
+    (
+        "dm_control locomotion",
+        ("shimmy.dm_control_compatibility",),
+        (
+            "dm_control.locomotion.examples.basic_cmu_2019",
+            "dm_control.locomotion.examples.basic_rodent_2020",
+        ),
+    ),
+    (
+        "dm_control manipulation",
+        ("shimmy.dm_control_compatibility",),
+        ("dm_control.manipulation",),
+    ),
+    ("pettingzoo", (), ("pettingzoo",)),
+    ("pyspiel", ("shimmy.openspiel_compatibility",), ("pyspiel",)),
+)
+
+# Each measurement runs in a fresh interpreter, such that no module is already imported.
+# The resident memory is read from `/proc` on Linux, otherwise the peak resident memory is used (0 if unavailable).
+_RSS_KB = """
+import json, os, sys, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes rather than KB
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+"""
+
+_MEASURE_SHIMMY_IMPORT = _RSS_KB + """
+modules = json.loads(sys.argv[1])
+start_rss, start = rss_kb(), time.perf_counter()
+import shimmy
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "rss_kb": rss_kb() - start_rss,
+    "eager": [module for module in modules if module in sys.modules],
+}))
+"""
+
+# The shimmy modules are imported before the backend modules, such that the backend modules raise the import error
+_MEASURE_BACKEND_IMPORT = _RSS_KB + """
+import importlib
+import shimmy
+modules = json.loads(sys.argv[1])
+start_rss, start = rss_kb(), time.perf_counter()
+try:
+    for module in modules:
+        importlib.import_module(module)
+except ImportError as e:
+    error = str(e)
+else:
+    error = None
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "rss_kb": rss_kb() - start_rss,
+    "error": error,
+}))
+"""
+
+
+def _run_measurement(code: str, modules: tuple[str, ...]) -> dict[str, Any]:
+    """Runs the measurement code in a fresh interpreter and returns its json output."""
+    result = subprocess.run(
+        [sys.executable, "-c", code, json.dumps(modules)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_cost() -> dict[str, Any]:
+    """Measures the import cost of shimmy and each optional backend.
+
+    Returns:
+        A dictionary with the cost of `import shimmy` and, for each backend, the wall time in seconds and the increase
+        of the resident memory in KB of importing the backend through shimmy's entry points (`entry_points`, the raw
+        backend modules if empty), if the backend is imported eagerly by `import shimmy` and the import error if
+        the backend is not installed.
+    """
+    all_modules = tuple(
+        module for _, _, modules in OPTIONAL_BACKENDS for module in modules
+    )
+    shimmy_cost = _run_measurement(_MEASURE_SHIMMY_IMPORT, all_modules)
+
+    backends = {}
+    for name, entry_points, modules in OPTIONAL_BACKENDS:
+        cost = _run_measurement(_MEASURE_BACKEND_IMPORT, entry_points + modules)
+        cost["entry_points"] = list(entry_points)
+        cost["eager"] = any(module in shimmy_cost["eager"] for module in modules)
+        backends[name] = cost
+
+    return {
+        "shimmy": {
+            "seconds": shimmy_cost["seconds"],
+            "rss_kb": shimmy_cost["rss_kb"],
+        },
+        "backends": backends,
+    }
+
+
+def _format_import_cost(report: dict[str, Any]) -> str:
+    """Formats the import cost report as a table."""
+    lines = [
+        "The backends are imported through shimmy's entry points, except for those marked as raw modules (*).",
+        f"{'backend':<25} {'time (s)':>9} {'memory (MB)':>12}  eager",
+        f"{'import shimmy':<25} {report['shimmy']['seconds']:>9.3f} {report['shimmy']['rss_kb'] / 1024:>12.1f}",
+    ]
+    for name, cost in report["backends"].items():
+        if not cost["entry_points"]:
+            name = f"{name} (*)"
+        if cost["error"] is not None:
+            lines.append(f"{name:<25} {'not installed':>22}  ({cost['error']})")
+        else:
+            lines.append(
+                f"{name:<25} {cost['seconds']:>9.3f} {cost['rss_kb'] / 1024:>12.1f}  {'yes' if cost['eager'] else 'no'}"
+            )
+    return "\n".join(lines)
+
+
+def main(args: list[str] | None = None):
+    """The command line entry point of the shimmy diagnostics."""
+    parser = argparse.ArgumentParser(
+        prog="python -m shimmy.diagnostics", description=__doc__
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_cost_parser = subparsers.add_parser(
+        "import-cost",
+        help="Reports the import time and memory of each optional backend.",
+    )
+    import_cost_parser.add_argument(
+        "--json", action="store_true", help="Prints the report as json."
+    )
+    parsed_args = parser.parse_args(args)
+
+    if parsed_args.command == "import-cost":
+        report = import_cost()
+        if parsed_args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(_format_import_cost(report))
+
+
+if __name__ == "__main__":
+    main()
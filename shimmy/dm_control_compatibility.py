@@ -8,11 +8,13 @@ and modified to modern gymnasium API
 from __future__ import annotations
 
 import math
+from collections import OrderedDict
 from enum import Enum
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Sequence
 
 import dm_env
 import gymnasium
+import mujoco
 import numpy as np
 from dm_control import composer
 from dm_control.mujoco.engine import Physics as MujocoEnginePhysics
@@ -22,7 +24,14 @@ from gymnasium.envs.mujoco.mujoco_rendering import MujocoRenderer
 from gymnasium.utils import EzPickle
 from mujoco._structs import MjvScene
 
-from shimmy.utils.dm_env import dm_env_step2gym_step, dm_spec2gym_space
+from shimmy.utils.dm_control import MultiCameraRenderer
+from shimmy.utils.dm_env import (
+    DmFlatObsConverter,
+    DmObsConverter,
+    dm_env_step2gym_step,
+    dm_spec2gym_space,
+)
+from shimmy.utils.instrumentation import DISABLED_STEP_TIMER, StepTimer
 
 
 class EnvType(Enum):
@@ -32,6 +41,24 @@ class EnvType(Enum):
     RL_CONTROL = 1
 
 
+# The render kwargs supported by the `MultiCameraRenderer`, otherwise `multi_camera` rendering uses `physics.render` per camera
+_MULTI_CAMERA_RENDERER_KWARGS = {"height", "width", "scene_option", "camera_ids"}
+# The size of the legacy `np.random.RandomState` MT19937 state, the 624 keys, position, has gauss and cached gaussian
+_RANDOM_STATE_SIZE = 624 + 3
+
+
+def _physics_state_sig() -> int:
+    """Returns the MuJoCo state saved by `get_state`, all state required to exactly continue the simulation.
+
+    The signature is looked up on use, such that the environments can still be imported with MuJoCo versions without `mj_getState`.
+    """
+    if not hasattr(mujoco, "mjtState"):
+        raise gymnasium.error.DependencyNotInstalled(
+            f"MuJoCo {mujoco.__version__} has no `mj_getState` (Hint: You need to upgrade mujoco with `pip install -U mujoco` to get and set the environment state)"
+        )
+    return mujoco.mjtState.mjSTATE_INTEGRATION
+
+
 class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
     """This compatibility wrapper converts a dm-control environment into a gymnasium environment.
 
@@ -52,36 +79,97 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
     """
 
     metadata = {
-        "render_modes": ["human", "rgb_array", "depth_array", "multi_camera"],
+        "render_modes": [
+            "human",
+            "rgb_array",
+            "depth_array",
+            "multi_camera",
+            "multi_camera_stack",
+        ],
         "render_fps": 10,  # this value is updated to use the `env.control_timesteps() * 1000`
     }
 
+    # If assigned, records the time of each step in dm-control (including the skipped frames), the conversion of the timestep and the human rendering
+    step_timer: StepTimer | None = None
+
     def __init__(
         self,
         env: composer.Environment | control.Environment | dm_env.Environment,
         render_mode: str | None = None,
         render_kwargs: dict[str, Any] | None = None,
+        flatten_observation: bool = False,
+        frame_skip: int = 1,
+        observation_keys: Sequence[str] | None = None,
+        observation_dtype: Any = None,
+        timestep_info: bool = True,
     ):
         """Initialises the environment with a render mode along with render information.
 
-        Note: this wrapper supports multi-camera rendering via the `render_mode` argument (render_mode = "multi_camera")
+        Note: this wrapper supports multi-camera rendering via the `render_mode` argument (render_mode = "multi_camera"),
+        as a mosaic of the cameras, or (render_mode = "multi_camera_stack") as a `(num_cameras, height, width, 3)` array.
+        For both, the cameras rendered can be specified with "camera_ids" in the `render_kwargs`, by default all the cameras.
+        With "depth" in the `render_kwargs`, "multi_camera_stack" returns a tuple of the rgb and `(num_cameras, height, width)` depth arrays,
+        that are overwritten by the next render, copy the arrays if they need to be kept.
 
         For more information on DM Control rendering, see https://github.com/deepmind/dm_control/blob/main/dm_control/mujoco/engine.py#L178
 
         Args:
             env (Optional[composer.Environment | control.Environment | dm_env.Environment]): DM Control env to wrap
-            render_mode (Optional[str]): rendering mode (options: "human", "rgb_array", "depth_array", "multi_camera")
+            render_mode (Optional[str]): rendering mode (options: "human", "rgb_array", "depth_array", "multi_camera", "multi_camera_stack")
             render_kwargs (Optional[dict[str, Any]]): Additional keyword arguments for rendering.
                 For the width, height and camera id use "width", "height" and "camera_id" respectively.
                 See the dm_control implementation for the list of possible kwargs, https://github.com/deepmind/dm_control/blob/330c91f41a21eacadcf8316f0a071327e3f5c017/dm_control/mujoco/engine.py#L178
                 Note: kwargs are not used for human rendering, which uses simpler Gymnasium MuJoCo rendering.
+            flatten_observation (bool): If to return observations as a flat float32 `Box` rather than a `Dict`,
+                equivalent to `gymnasium.wrappers.FlattenObservation`. The observation is written into a preallocated
+                buffer that is reused between steps, copy the observation if it needs to be kept.
+            frame_skip (int): The number of times each action is repeated, summing the rewards and multiplying the discounts.
+                The repeats stop early at the end of the episode and only the final observation is converted.
+            observation_keys (Optional[Sequence[str]]): The observation keys to keep, by default all the observations.
+                For composer environments, the observables of the other observations are disabled.
+            observation_dtype (Optional[np.dtype]): The dtype of the floating point observations, e.g., `np.float32`, by default the dtype of the observation spec.
+                With `flatten_observation`, this is the dtype of the flat buffer (by default float32).
+            timestep_info (bool): If to include the `"timestep.discount"` and `"timestep.step_type"` in the info, otherwise the info is empty
         """
-        EzPickle.__init__(self, env, render_mode, render_kwargs)
+        EzPickle.__init__(
+            self,
+            env,
+            render_mode,
+            render_kwargs,
+            flatten_observation,
+            frame_skip,
+            observation_keys,
+            observation_dtype,
+            timestep_info,
+        )
+        self.timestep_info = timestep_info
+        assert frame_skip >= 1, f"Expected frame_skip >= 1, actual: {frame_skip}"
+        self.frame_skip = frame_skip
         self._env: Any = env
         self.env_type = self._find_env_type(env)
+        self._base_env = self._find_base_env(env)
         self.metadata["render_fps"] = self._env.control_timestep() * 1000
 
-        self.observation_space = dm_spec2gym_space(env.observation_spec())
+        observation_spec = env.observation_spec()
+        self.observation_keys = observation_keys
+        if self.observation_keys is not None:
+            observation_spec = self._filter_observation_spec(
+                observation_spec, self.observation_keys
+            )
+
+        self.flatten_observation = flatten_observation
+        self.observation_dtype = observation_dtype
+        if self.flatten_observation:
+            self._obs_converter = DmFlatObsConverter(
+                observation_spec,
+                np.float32 if observation_dtype is None else observation_dtype,
+            )
+            self.observation_space = self._obs_converter.space
+        else:
+            self._obs_converter = DmObsConverter(observation_spec, observation_dtype)
+            self.observation_space = dm_spec2gym_space(
+                observation_spec, observation_dtype
+            )
         self.action_space = dm_spec2gym_space(env.action_spec())
 
         assert render_mode is None or render_mode in self.metadata["render_modes"]
@@ -91,16 +179,44 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
             render_kwargs = {}
         self.render_kwargs = render_kwargs
 
+        self._multi_camera_renderer: MultiCameraRenderer | None = None
+
         if self.render_mode == "human":
             # We use the gymnasium mujoco rendering, dm-control provides more complex rendering options.
             self.viewer = MujocoRenderer(
                 self._env.physics.model.ptr, self._env.physics.data.ptr
             )
 
+    def _filter_observation_spec(
+        self, observation_spec: dict[str, Any], observation_keys: Sequence[str]
+    ) -> OrderedDict[str, Any]:
+        """Returns the observation spec of the observation keys, disabling the other observables of composer environments."""
+        missing_keys = [key for key in observation_keys if key not in observation_spec]
+        if missing_keys:
+            raise ValueError(
+                f"The observation keys, {missing_keys}, are not in the observation spec, {list(observation_spec.keys())}"
+            )
+
+        # Only the observation updater of an unwrapped composer environment can be updated, as wrappers may use the observation spec
+        if self.env_type is EnvType.COMPOSER and self._env is self._base_env:
+            for name, observable in self._env.task.observables.items():
+                if name not in observation_keys:
+                    observable.enabled = False
+            self._env._observation_updater = self._env._make_observation_updater()
+            self._env._observation_updater.reset(
+                self._env._physics_proxy, self._env._random_state
+            )
+
+        return OrderedDict(
+            (key, spec)
+            for key, spec in observation_spec.items()
+            if key in observation_keys
+        )
+
     @property
     def dt(self):
-        """Returns the environment control timestep which is equivalent to the number of actions per second."""
-        return self._env.control_timestep()
+        """Returns the environment control timestep, multiplied by the frame skip, which is equivalent to the number of actions per second."""
+        return self._env.control_timestep() * self.frame_skip
 
     def reset(
         self, *, seed: int | None = None, options: dict[str, Any] | None = None
@@ -111,7 +227,9 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
             self.np_random = np.random.RandomState(seed=seed)
 
         timestep = self._env.reset()
-        obs, reward, terminated, truncated, info = dm_env_step2gym_step(timestep)
+        obs, reward, terminated, truncated, info = dm_env_step2gym_step(
+            timestep, self._obs_converter, self.timestep_info
+        )
 
         if self.render_mode == "human":
             self.viewer.close()
@@ -124,13 +242,31 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
     def step(
         self, action: np.ndarray
     ) -> tuple[ObsType, float, bool, bool, dict[str, Any]]:
-        """Steps through the dm-control environment."""
-        timestep = self._env.step(action)
+        """Steps through the dm-control environment, repeating the action `frame_skip` times."""
+        step_timer = self.step_timer or DISABLED_STEP_TIMER
+        step_timer.start()
 
-        obs, reward, terminated, truncated, info = dm_env_step2gym_step(timestep)
+        timestep = self._env.step(action)
+        if self.frame_skip > 1 and timestep.mid():
+            reward, discount = timestep.reward or 0.0, timestep.discount
+            for _ in range(self.frame_skip - 1):
+                timestep = self._env.step(action)
+                reward += timestep.reward or 0.0
+                discount *= timestep.discount
+                if timestep.last():
+                    break
+            timestep = timestep._replace(reward=reward, discount=discount)
+        step_timer.lap("env")
+
+        obs, reward, terminated, truncated, info = dm_env_step2gym_step(
+            timestep, self._obs_converter, self.timestep_info
+        )
+        step_timer.lap("conversion")
 
         if self.render_mode == "human":
             self.viewer.render(self.render_mode)
+        step_timer.lap("render")
+        step_timer.stop()
 
         return (
             obs,
@@ -140,7 +276,96 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
             info,
         )
 
-    def render(self) -> np.ndarray | None:
+    def get_state(self) -> np.ndarray:
+        """Returns a snapshot of the environment state that can be restored with :meth:`set_state`.
+
+        The snapshot is a flat float64 array of the MuJoCo integration state (time, `qpos`, `qvel`, `act`,
+        controls, applied forces, mocap and warm-start), the task random state (`np_random`) and the episode step counters.
+
+        Note:
+            Changes to the MuJoCo model during an episode, the state of composer observables with a delay or buffer
+            and any other task attributes are not included in the snapshot.
+
+        Returns:
+            The environment state
+        """
+        physics = self._base_env.physics
+        state_sig = _physics_state_sig()
+        physics_size = mujoco.mj_stateSize(physics.model.ptr, state_sig)
+        state = np.empty(physics_size + _RANDOM_STATE_SIZE + 2, dtype=np.float64)
+        mujoco.mj_getState(
+            physics.model.ptr,
+            physics.data.ptr,
+            state[:physics_size],
+            state_sig,
+        )
+
+        _, keys, pos, has_gauss, cached_gaussian = self.np_random.get_state()
+        random_state = state[physics_size : physics_size + _RANDOM_STATE_SIZE]
+        random_state[:-3] = keys
+        random_state[-3:] = pos, has_gauss, cached_gaussian
+
+        state[-2] = self._step_count
+        state[-1] = self._base_env._reset_next_step
+        return state
+
+    def set_state(self, state: np.ndarray):
+        """Restores the environment to a snapshot of :meth:`get_state`, without resetting the environment.
+
+        Args:
+            state (np.ndarray): The environment state returned by :meth:`get_state`
+
+        Raises:
+            ValueError: If the state size doesn't match the environment
+        """
+        physics = self._base_env.physics
+        state_sig = _physics_state_sig()
+        physics_size = mujoco.mj_stateSize(physics.model.ptr, state_sig)
+        if state.shape != (physics_size + _RANDOM_STATE_SIZE + 2,):
+            raise ValueError(
+                f"Expected the state to have shape {(physics_size + _RANDOM_STATE_SIZE + 2,)}, actual shape: {state.shape}"
+            )
+
+        state = np.asarray(state, dtype=np.float64)
+        mujoco.mj_setState(
+            physics.model.ptr,
+            physics.data.ptr,
+            state[:physics_size],
+            state_sig,
+        )
+        # recompute the derived quantities, e.g., positions and sensors, used by the observations
+        physics.forward()
+
+        random_state = state[physics_size : physics_size + _RANDOM_STATE_SIZE]
+        self.np_random.set_state(
+            (
+                "MT19937",
+                random_state[:-3].astype(np.uint32),
+                int(random_state[-3]),
+                int(random_state[-2]),
+                float(random_state[-1]),
+            )
+        )
+
+        self._step_count = int(state[-2])
+        self._base_env._reset_next_step = bool(state[-1])
+
+    @property
+    def _step_count(self) -> int:
+        """The number of steps in the current episode of the dm-control environment."""
+        if self.env_type is EnvType.RL_CONTROL:
+            return self._base_env._step_count
+        else:
+            return self._base_env._hooks._episode_step_count
+
+    @_step_count.setter
+    def _step_count(self, value: int):
+        if self.env_type is EnvType.RL_CONTROL:
+            self._base_env._step_count = value
+        else:
+            self._base_env._hooks._episode_step_count = value
+
+    def render(self) -> np.ndarray | tuple[np.ndarray, np.ndarray] | None:
         """Renders the dm-control env."""
         if self.render_mode == "rgb_array":
             return self._env.physics.render(
@@ -152,6 +377,17 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
                 **self.render_kwargs,
             )
         elif self.render_mode == "multi_camera":
+            assert (
+                "camera_id" not in self.render_kwargs
+            ), "The camera_id is specified in `multi_camera` render so don't include it in the render_kwargs"
+            if set(self.render_kwargs) <= _MULTI_CAMERA_RENDERER_KWARGS:
+                # the renderer's frame is overwritten by the next render, e.g., while frames are collected for a video
+                return self._get_multi_camera_renderer().render().copy()
+
+            # other render kwargs, e.g., overlays, are only supported by `physics.render`
+            assert (
+                "camera_ids" not in self.render_kwargs
+            ), f"The camera_ids is only supported with the {_MULTI_CAMERA_RENDERER_KWARGS} render_kwargs"
             physics = self._env.physics
             num_cameras = physics.model.ncam
             num_columns = int(math.ceil(math.sqrt(num_cameras)))
@@ -164,9 +400,6 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
                 (num_rows * height, num_columns * width, 3),
                 dtype=np.uint8,
             )
-            assert (
-                "camera_id" not in self.render_kwargs
-            ), "The camera_id is specified in `multi_camera` render so don't include it in the render_kwargs"
             for col in range(num_columns):
                 for row in range(num_rows):
                     camera_id = row * num_columns + col
@@ -182,8 +415,32 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
                     ] = subframe
             return frame
 
+        elif self.render_mode == "multi_camera_stack":
+            assert set(self.render_kwargs) <= _MULTI_CAMERA_RENDERER_KWARGS | {
+                "depth"
+            }, f"The `multi_camera_stack` render only supports the {_MULTI_CAMERA_RENDERER_KWARGS | {'depth'}} render_kwargs, actual: {set(self.render_kwargs)}"
+            return self._get_multi_camera_renderer().render()
+
+    def _get_multi_camera_renderer(self) -> MultiCameraRenderer:
+        """Returns the multi-camera renderer, creating it if the physics has been recompiled, e.g., on a composer reset."""
+        physics = self._base_env.physics
+        if (
+            self._multi_camera_renderer is None
+            or self._multi_camera_renderer.physics.model.ptr is not physics.model.ptr
+        ):
+            if self._multi_camera_renderer is not None:
+                self._multi_camera_renderer.close()
+            self._multi_camera_renderer = MultiCameraRenderer(
+                physics,
+                stack=self.render_mode == "multi_camera_stack",
+                **self.render_kwargs,
+            )
+        return self._multi_camera_renderer
+
     def close(self):
         """Closes the environment."""
+        if self._multi_camera_renderer is not None:
+            self._multi_camera_renderer.close()
         self._env.physics.free()
         self._env.close()
 
@@ -209,6 +466,23 @@ class DmControlCompatibilityV0(gymnasium.Env[ObsType, np.ndarray], EzPickle):
         """If the attribute is missing, try getting the attribute from dm_control env."""
         return getattr(self._env, item)
 
+    def _find_base_env(self, env) -> composer.Environment | control.Environment:
+        """Finds the dm-control environment within any environment wrappers."""
+        if isinstance(env, (composer.Environment, control.Environment)):
+            return env
+        elif hasattr(env, "_env"):
+            return self._find_base_env(
+                env._env  # pyright: ignore[reportGeneralTypeIssues]
+            )
+        elif hasattr(env, "env"):
+            return self._find_base_env(
+                env.env  # pyright: ignore[reportGeneralTypeIssues]
+            )
+        else:
+            raise AttributeError(
+                f"Can't find the dm-control environment, actual type: {type(env)}"
+            )
+
     def _find_env_type(self, env) -> EnvType:
         """Tries to discover env types, in particular for environments with wrappers."""
         if isinstance(env, composer.Environment):
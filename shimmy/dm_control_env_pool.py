@@ -0,0 +1,255 @@
+"""A pool of pre-constructed and pre-reset dm-control environments."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import gymnasium as gym
+
+from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+
+
+class DmControlEnvPoolV0:
+    """A pool of :class:`shimmy.DmControlCompatibilityV0` environments, per registered environment ID, handed out already reset.
+
+    Constructing a dm-control environment (compiling the model, converting the specs and setting up the renderer)
+    often costs more than a short episode. The pool keeps the environments that are checked in, resets them
+    in a background thread and hands them out again on the next checkout of the same environment ID.
+
+    Example:
+        >>> from shimmy.dm_control_env_pool import DmControlEnvPoolV0
+        >>> pool = DmControlEnvPoolV0()
+        >>> env, obs, info = pool.checkout("dm_control/cartpole-balance-v0")
+        >>> obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
+        >>> pool.checkin(env)
+        >>> pool.stats()["hits"], pool.stats()["misses"]
+        (0, 1)
+
+    Note:
+        The checked out environments are the unwrapped :class:`shimmy.DmControlCompatibilityV0`,
+        such that episodes are not truncated by a `TimeLimit` or re-checked by the environment checker.
+        As environments are reset in a background thread, `render_mode="human"` is not supported.
+    """
+
+    def __init__(
+        self,
+        max_idle_per_id: int = 8,
+        background_reset: bool = True,
+        make_kwargs: dict[str, Any] | None = None,
+    ):
+        """Initialises the empty pool.
+
+        Args:
+            max_idle_per_id (int): The maximum number of idle environments kept per environment ID, additional environments checked in are closed
+            background_reset (bool): If to reset the checked in environments in a background thread, otherwise they are reset on checkout
+            make_kwargs (Optional[dict[str, Any]]): Keyword arguments for `gymnasium.make` of every environment, e.g., `render_mode` or `model_cache_dir`
+        """
+        self.max_idle_per_id = max_idle_per_id
+        self.background_reset = background_reset
+        self.make_kwargs = {} if make_kwargs is None else make_kwargs
+        assert self.make_kwargs.get("render_mode") != "human"
+
+        # The idle environments per ID, with the future of their (observation, info) reset
+        self._idle: defaultdict[
+            str, deque[tuple[DmControlCompatibilityV0, Future | None]]
+        ] = defaultdict(deque)
+        # The number of idle slots reserved per ID by `prefill` for the environments under construction
+        self._reserved: defaultdict[str, int] = defaultdict(int)
+        # The environment ID of every checked out environment, by object id
+        self._checked_out: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="shimmy-env-pool")
+            if background_reset
+            else None
+        )
+        self._closed = False
+
+        # The statistics, updated under the lock as environments are checked out and constructed in several threads
+        self._hits = 0
+        self._misses = 0
+        self._total_checkout_latency = 0.0
+        self._max_checkout_latency = 0.0
+        self._constructions = 0
+        self._total_construction_time = 0.0
+
+    def _make(self, env_id: str) -> DmControlCompatibilityV0:
+        """Constructs a new environment for the environment ID."""
+        start = time.perf_counter()
+        env = gym.make(env_id, disable_env_checker=True, **self.make_kwargs).unwrapped
+        if not isinstance(env, DmControlCompatibilityV0):
+            env.close()
+            raise TypeError(
+                f"Expected {env_id} to be a `DmControlCompatibilityV0` environment, actual type: {type(env)}"
+            )
+        construction_time = time.perf_counter() - start
+        with self._lock:
+            self._constructions += 1
+            self._total_construction_time += construction_time
+        return env
+
+    def prefill(self, env_id: str, num_envs: int):
+        """Constructs and resets `num_envs` idle environments for the environment ID, up to `max_idle_per_id`.
+
+        The idle slot of each environment is reserved before it is constructed outside the lock,
+        such that concurrent prefills and checkins never exceed `max_idle_per_id`.
+
+        Args:
+            env_id (str): The registered environment ID
+            num_envs (int): The number of environments to add to the pool
+        """
+        for _ in range(num_envs):
+            with self._lock:
+                if (
+                    len(self._idle[env_id]) + self._reserved[env_id]
+                    >= self.max_idle_per_id
+                ):
+                    return
+                self._reserved[env_id] += 1
+
+            try:
+                env = self._make(env_id)
+            except BaseException:
+                with self._lock:
+                    self._reserved[env_id] -= 1
+                raise
+            self._add_idle(env_id, env, reserved=True)
+
+    def checkout(
+        self,
+        env_id: str,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[DmControlCompatibilityV0, Any, dict[str, Any]]:
+        """Takes an environment from the pool, constructing one if no environment is idle.
+
+        An idle environment that was reset in the background is returned without another reset,
+        if a `seed` or `options` are provided the environment is reset again with them.
+
+        Args:
+            env_id (str): The registered environment ID
+            seed (Optional[int]): The seed to reset the environment with
+            options (Optional[dict[str, Any]]): The options to reset the environment with
+
+        Returns:
+            The environment with the observation and info of its reset.
+        """
+        assert not self._closed, "The pool is closed."
+        start = time.perf_counter()
+        with self._lock:
+            idle = self._idle[env_id].popleft() if self._idle[env_id] else None
+            if idle is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if idle is None:
+            env, reset_future = self._make(env_id), None
+        else:
+            env, reset_future = idle
+
+        # the environment is no longer tracked by the pool, such that it is closed if its reset fails
+        try:
+            reset = None if reset_future is None else reset_future.result()
+            if reset is None or seed is not None or options is not None:
+                reset = env.reset(seed=seed, options=options)
+        except BaseException:
+            env.close()
+            raise
+        obs, info = reset
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._checked_out[id(env)] = env_id
+            self._total_checkout_latency += latency
+            self._max_checkout_latency = max(self._max_checkout_latency, latency)
+        return env, obs, info
+
+    def checkin(self, env: DmControlCompatibilityV0):
+        """Returns a checked out environment to the pool, the environment should not be used afterwards.
+
+        Args:
+            env (DmControlCompatibilityV0): The environment returned by :meth:`checkout`
+        """
+        with self._lock:
+            env_id = self._checked_out.pop(id(env), None)
+        if env_id is None:
+            raise ValueError(
+                f"The environment, {env}, was not checked out of the pool."
+            )
+
+        if self._closed:
+            env.close()
+        else:
+            self._add_idle(env_id, env)
+
+    def _add_idle(
+        self, env_id: str, env: DmControlCompatibilityV0, reserved: bool = False
+    ):
+        """Adds the environment to the idle environments, resetting it in the background, or closes it if the pool for the ID is full.
+
+        Args:
+            env_id (str): The environment ID
+            env (DmControlCompatibilityV0): The environment
+            reserved (bool): If the environment takes an idle slot reserved by :meth:`prefill`
+        """
+        with self._lock:
+            if reserved:
+                self._reserved[env_id] -= 1
+            if (
+                self._closed
+                or len(self._idle[env_id]) + self._reserved[env_id]
+                >= self.max_idle_per_id
+            ):
+                env.close()
+                return
+            reset_future = (
+                None if self._executor is None else self._executor.submit(env.reset)
+            )
+            self._idle[env_id].append((env, reset_future))
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the pool statistics.
+
+        Returns:
+            A dictionary with the number of checkouts served by an idle environment (`hits`) or a new environment (`misses`),
+            the mean and max checkout latency and the mean construction time in seconds and the number of idle environments per ID.
+        """
+        with self._lock:
+            idle = {env_id: len(envs) for env_id, envs in self._idle.items() if envs}
+            checkouts = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "mean_checkout_latency": self._total_checkout_latency
+                / max(checkouts, 1),
+                "max_checkout_latency": self._max_checkout_latency,
+                "mean_construction_time": self._total_construction_time
+                / max(self._constructions, 1),
+                "idle": idle,
+            }
+
+    def close(self):
+        """Closes all idle environments, checked out environments are closed when checked in."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        with self._lock:
+            for envs in self._idle.values():
+                for env, _ in envs:
+                    env.close()
+            self._idle.clear()
+
+    def __enter__(self) -> DmControlEnvPoolV0:
+        """Returns the pool."""
+        return self
+
+    def __exit__(self, *args: Any):
+        """Closes the pool."""
+        self.close()
@@ -11,16 +11,20 @@ import gymnasium
 import numpy as np
 from gymnasium.envs.mujoco.mujoco_rendering import MujocoRenderer
 from gymnasium.utils import EzPickle
+from gymnasium.vector.utils import batch_space, create_empty_array
 from pettingzoo.utils.env import ActionDict, AgentID, ObsDict, ParallelEnv
 
 from shimmy.utils.dm_control_multiagent import load_dm_control_soccer
-from shimmy.utils.dm_env import dm_obs2gym_obs, dm_spec2gym_space
+from shimmy.utils.dm_env import DmObsConverter, dm_obs2gym_obs, dm_spec2gym_space
+from shimmy.utils.instrumentation import DISABLED_STEP_TIMER, StepTimer
 
 if TYPE_CHECKING:
     from dm_control.locomotion import soccer as dm_soccer
 
 
-def _unravel_ma_timestep(timestep: dm_env.TimeStep, agents: list[AgentID]) -> tuple[
+def _unravel_ma_timestep(
+    timestep: dm_env.TimeStep, agents: list[AgentID], timestep_info: bool = True
+) -> tuple[
     dict[AgentID, Any],
     dict[AgentID, float],
     dict[AgentID, bool],
@@ -41,23 +45,27 @@ def _unravel_ma_timestep(timestep: dm_env.TimeStep, agents: list[AgentID]) -> tu
     observations: dict[AgentID, Any] = dict(zip(agents, list_observations))
 
     # sometimes deepmind decides not to reward people
-    rewards: dict[AgentID, float] = {agent: 0.0 for agent in agents}
-
+    rewards: dict[AgentID, float]
     if timestep.reward:
         rewards = dict(zip(agents, timestep.reward))
+    else:
+        rewards = dict.fromkeys(agents, 0.0)
 
     # expand everything else
-    terminations: dict[AgentID, bool] = {agent: term for agent in agents}
-    truncations: dict[AgentID, bool] = {agent: trunc for agent in agents}
+    terminations: dict[AgentID, bool] = dict.fromkeys(agents, term)
+    truncations: dict[AgentID, bool] = dict.fromkeys(agents, trunc)
 
     # duplicate infos across agents
-    infos = {
-        agent: {
-            "timestep.discount": timestep.discount,
-            "timestep.step_type": timestep.step_type,
+    if timestep_info:
+        infos = {
+            agent: {
+                "timestep.discount": timestep.discount,
+                "timestep.step_type": timestep.step_type,
+            }
+            for agent in agents
         }
-        for agent in agents
-    }
+    else:
+        infos = {agent: {} for agent in agents}
 
     return (
         observations,
@@ -77,6 +85,9 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
 
     metadata = {"render_modes": ["human"], "name": "DmControlMultiAgentCompatibilityV0"}
 
+    # If assigned, records the time of each (batched) step in the soccer environment, the conversion of the timestep to the agents' returns and the human rendering
+    step_timer: StepTimer | None = None
+
     def __init__(
         self,
         env: dm_control.composer.Environment | None = None,
@@ -87,6 +98,8 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
         terminate_on_goal: bool | None = None,
         walker_type: dm_soccer.WalkerType | None = None,
         render_mode: str | None = None,
+        timestep_info: bool = True,
+        persistent_step_containers: bool = False,
     ):
         """Wrapper to convert a dm control multi-agent environment into a PettingZoo environment.
 
@@ -104,8 +117,17 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
             terminate_on_goal (Optional[bool]): flag to terminate the environment on goal                 [DM CONTROL ARG]
             walker_type (Optional[dm_soccer.WalkerType]): specify walker type (BOXHEAD, ANT, or HUMANOID) [DM CONTROL ARG]
             render_mode (Optional[str]): rendering mode
+            timestep_info (bool): If to include the `"timestep.discount"` and `"timestep.step_type"` in the agent infos, otherwise the agent infos are empty
+            persistent_step_containers (bool): If to return the same observation, reward, termination, truncation and info dicts on every step and reset,
+                updated in place, along with the `reward_array`, `termination_array` and `truncation_array` of the agents. Copy the dicts if they need to be kept.
         """
-        EzPickle.__init__(self, env=env, render_mode=render_mode)
+        EzPickle.__init__(
+            self,
+            env=env,
+            render_mode=render_mode,
+            timestep_info=timestep_info,
+            persistent_step_containers=persistent_step_containers,
+        )
         ParallelEnv.__init__(self)
 
         DM_CONTROL_ARGS = [
@@ -139,11 +161,12 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
             self._env = env
 
         self.render_mode = render_mode
+        self.timestep_info = timestep_info
+        self.persistent_step_containers = persistent_step_containers
 
         # get action and observation specs first
-        all_obs_spaces = [
-            dm_spec2gym_space(spec) for spec in self._env.observation_spec()
-        ]
+        obs_specs = self._env.observation_spec()
+        all_obs_spaces = [dm_spec2gym_space(spec) for spec in obs_specs]
         all_act_spaces = [dm_spec2gym_space(spec) for spec in self._env.action_spec()]
         num_players = len(all_obs_spaces)
 
@@ -156,6 +179,64 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
         self.obs_spaces = dict(zip(self.possible_agents, all_obs_spaces))
         self.act_spaces = dict(zip(self.possible_agents, all_act_spaces))
 
+        if self.persistent_step_containers:
+            self._obs_converters = [DmObsConverter(spec) for spec in obs_specs]
+            self._observations: dict[AgentID, Any] = {}
+            self._rewards: dict[AgentID, float] = dict.fromkeys(
+                self.possible_agents, 0.0
+            )
+            self._terminations: dict[AgentID, bool] = dict.fromkeys(
+                self.possible_agents, False
+            )
+            self._truncations: dict[AgentID, bool] = dict.fromkeys(
+                self.possible_agents, False
+            )
+            self._infos: dict[AgentID, dict[str, Any]] = {
+                agent: {} for agent in self.possible_agents
+            }
+            # The rewards, terminations and truncations in the order of `possible_agents`
+            self.reward_array = np.zeros(num_players, dtype=np.float64)
+            self.termination_array = np.zeros(num_players, dtype=np.bool_)
+            self.truncation_array = np.zeros(num_players, dtype=np.bool_)
+
+        # As the agents of the batched API share the observation and action space, the spaces are only defined if all agents' spaces are equal
+        if all(space == all_obs_spaces[0] for space in all_obs_spaces) and all(
+            space == all_act_spaces[0] for space in all_act_spaces
+        ):
+            self.batched_observation_space: gymnasium.spaces.Space | None = batch_space(
+                all_obs_spaces[0], num_players
+            )
+            self.batched_action_space: gymnasium.spaces.Space | None = batch_space(
+                all_act_spaces[0], num_players
+            )
+            self._batched_observations = create_empty_array(
+                all_obs_spaces[0], n=num_players, fn=np.zeros
+            )
+            # For each agent, the observation leaves with the view of their batched buffer
+            self._batched_obs_views: list[
+                list[tuple[tuple[str, ...], str | None, np.ndarray]]
+            ] = []
+            obs_converter = DmObsConverter(obs_specs[0])
+            for i in range(num_players):
+                if not obs_converter.is_dict:
+                    self._batched_obs_views.append(
+                        [((), None, self._batched_observations[i, ...])]
+                    )
+                    continue
+                views = []
+                for path, key, _, _ in obs_converter.entries:
+                    buffer = self._batched_observations
+                    for parent_key in path:
+                        buffer = buffer[parent_key]
+                    views.append((path, key, buffer[key][i, ...]))
+                self._batched_obs_views.append(views)
+            self._batched_rewards = np.zeros(num_players, dtype=np.float64)
+            self._batched_terminations = np.zeros(num_players, dtype=np.bool_)
+            self._batched_truncations = np.zeros(num_players, dtype=np.bool_)
+        else:
+            self.batched_observation_space = None
+            self.batched_action_space = None
+
         if self.render_mode == "human":
             assert self._env.physics is not None
             self.viewer = MujocoRenderer(
@@ -235,7 +316,12 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
 
         self._env._random_state = np.random.RandomState(seed)
         timestep = self._env.reset()
-        observations, _, _, _, info = _unravel_ma_timestep(timestep, self.agents)
+        if self.persistent_step_containers:
+            observations, _, _, _, info = self._update_step_containers(timestep)
+        else:
+            observations, _, _, _, info = _unravel_ma_timestep(
+                timestep, self.agents, self.timestep_info
+            )
 
         if self.render_mode == "human":
             self.viewer.close()
@@ -246,6 +332,168 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
 
         return observations, info
 
+    def _check_batched(self):
+        """Checks that all agents share the observation and action space, as required by the batched API."""
+        if self.batched_observation_space is None:
+            raise ValueError(
+                "The batched API requires all agents to have the same observation and action space."
+            )
+
+    def _write_batched_timestep(
+        self, timestep: dm_env.TimeStep
+    ) -> tuple[Any, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """Writes the timestep into the batched buffers."""
+        for views, obs in zip(self._batched_obs_views, timestep.observation):
+            for path, key, view in views:
+                value = obs
+                for parent_key in path:
+                    value = value[parent_key]
+                np.copyto(view, value if key is None else value[key], casting="unsafe")
+
+        # sometimes deepmind decides not to reward people
+        if timestep.reward:
+            for i, reward in enumerate(timestep.reward):
+                self._batched_rewards[i] = reward
+        else:
+            self._batched_rewards.fill(0.0)
+
+        last = timestep.last()
+        self._batched_terminations.fill(last and timestep.discount != 0)
+        self._batched_truncations.fill(last and timestep.discount == 0)
+
+        info = (
+            {
+                "timestep.discount": timestep.discount,
+                "timestep.step_type": timestep.step_type,
+            }
+            if self.timestep_info
+            else {}
+        )
+        return (
+            self._batched_observations,
+            self._batched_rewards,
+            self._batched_terminations,
+            self._batched_truncations,
+            info,
+        )
+
+    def reset_batched(
+        self, seed: int | None = None, options: dict[AgentID, Any] | None = None
+    ) -> tuple[Any, dict[str, Any]]:
+        """Resets the dm-control environment, returning the observations stacked in the order of `possible_agents`.
+
+        The returned observations are a buffer overwritten by the next batched reset or step, copy them if they need to be kept.
+
+        Args:
+            seed: the seed to reset the environment with
+            options: the options to reset the environment with (unused)
+
+        Returns:
+            (observations, info) with the observations in the `batched_observation_space` and the info shared by all agents
+        """
+        self._check_batched()
+        self.agents = self.possible_agents[:]
+        self.num_moves = 0
+
+        self._env._random_state = np.random.RandomState(seed)
+        timestep = self._env.reset()
+        observations, _, _, _, info = self._write_batched_timestep(timestep)
+
+        if self.render_mode == "human":
+            self.viewer.close()
+            assert self._env.physics is not None
+            self.viewer = MujocoRenderer(
+                self._env.physics.model.ptr, self._env.physics.data.ptr
+            )
+
+        return observations, info
+
+    def step_batched(
+        self, actions: np.ndarray
+    ) -> tuple[Any, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """Steps through all agents with the stacked actions, without per-agent dicts.
+
+        The returned observations, rewards, terminations and truncations are buffers overwritten by the next batched reset or step,
+        copy them if they need to be kept.
+
+        Args:
+            actions: The actions of all agents stacked in the order of `possible_agents`, in the `batched_action_space`
+
+        Returns:
+            (observations, rewards, terminations, truncations, info) stacked in the order of `possible_agents`, with the info shared by all agents
+        """
+        self._check_batched()
+        assert self.batched_action_space is not None
+        actions = np.asarray(actions)
+        assert (
+            actions.shape == self.batched_action_space.shape
+        ), f"Expected the actions of shape {self.batched_action_space.shape}, actual shape: {actions.shape}."
+        assert self.agents, "The episode has ended, reset the environment."
+
+        step_timer = self.step_timer or DISABLED_STEP_TIMER
+        step_timer.start()
+
+        timestep = self._env.step(actions)
+        step_timer.lap("env")
+
+        step_returns = self._write_batched_timestep(timestep)
+        step_timer.lap("conversion")
+
+        if self.render_mode == "human":
+            self.viewer.render(self.render_mode)
+        step_timer.lap("render")
+        step_timer.stop()
+
+        if timestep.last():
+            self.agents = []
+
+        return step_returns
+
+    def _update_step_containers(self, timestep: dm_env.TimeStep) -> tuple[
+        dict[AgentID, Any],
+        dict[AgentID, float],
+        dict[AgentID, bool],
+        dict[AgentID, bool],
+        dict[AgentID, Any],
+    ]:
+        """Updates the persistent step dicts and arrays in place with the timestep, equivalent to :func:`_unravel_ma_timestep`."""
+        term, trunc = False, False
+        if timestep.last():
+            if timestep.discount == 0:
+                trunc = True
+            else:
+                term = True
+        self.termination_array.fill(term)
+        self.truncation_array.fill(trunc)
+
+        # sometimes deepmind decides not to reward people
+        if timestep.reward:
+            self.reward_array[:] = timestep.reward
+            rewards = timestep.reward
+        else:
+            self.reward_array.fill(0.0)
+            rewards = (0.0,) * len(self.possible_agents)
+
+        for agent, obs_converter, obs, reward in zip(
+            self.possible_agents, self._obs_converters, timestep.observation, rewards
+        ):
+            self._observations[agent] = obs_converter(obs)
+            self._rewards[agent] = reward
+            self._terminations[agent] = term
+            self._truncations[agent] = trunc
+            if self.timestep_info:
+                info = self._infos[agent]
+                info["timestep.discount"] = timestep.discount
+                info["timestep.step_type"] = timestep.step_type
+
+        return (
+            self._observations,
+            self._rewards,
+            self._terminations,
+            self._truncations,
+            self._infos,
+        )
+
     def step(self, actions: ActionDict) -> tuple[
         ObsDict,
         dict[AgentID, float],
@@ -268,14 +516,26 @@ class DmControlMultiAgentCompatibilityV0(ParallelEnv, EzPickle):
             self.agents
         ), f"Must have actions for all {len(self.agents)} agents, currently only found {len(actions)}."
 
+        step_timer = self.step_timer or DISABLED_STEP_TIMER
+        step_timer.start()
+
         timestep = self._env.step(actions.values())
+        step_timer.lap("env")
 
-        obs, rewards, terminations, truncations, infos = _unravel_ma_timestep(
-            timestep, self.agents
-        )
+        if self.persistent_step_containers:
+            obs, rewards, terminations, truncations, infos = (
+                self._update_step_containers(timestep)
+            )
+        else:
+            obs, rewards, terminations, truncations, infos = _unravel_ma_timestep(
+                timestep, self.agents, self.timestep_info
+            )
+        step_timer.lap("conversion")
 
         if self.render_mode == "human":
             self.viewer.render(self.render_mode)
+        step_timer.lap("render")
+        step_timer.stop()
 
         if any(terminations.values()) or any(truncations.values()):
             self.agents = []
@@ -0,0 +1,608 @@
+"""Native vector environments for dm-control environments."""
+
+from __future__ import annotations
+
+import multiprocessing
+import traceback
+from copy import deepcopy
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Iterator, Sequence
+
+import dm_env
+import numpy as np
+from dm_control.rl import control
+from gymnasium import spaces
+from gymnasium.core import ObsType
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import CloudpickleWrapper, batch_space, create_empty_array
+
+from shimmy.utils.dm_control import load_dm_control_suite
+from shimmy.utils.dm_env import DmFlatObsConverter, DmObsConverter, dm_spec2gym_space
+from shimmy.utils.vector_env import check_autoreset_mode, vector_reset_args
+
+
+class DmControlSuiteVectorEnvV0(VectorEnv[ObsType, np.ndarray, np.ndarray]):
+    """A vector environment that steps a batch of dm-control suite environments without per sub-environment wrappers.
+
+    Rather than wrapping each sub-environment with :class:`shimmy.DmControlCompatibilityV0` and batching
+    the observations with :class:`gymnasium.vector.SyncVectorEnv`, the suite environments are owned directly.
+    Each timestep observation is written straight into the batched observation buffer at the sub-environment's index,
+    with the buffer layout compiled once from the `observation_spec()`.
+
+    Example:
+        >>> from shimmy.dm_control_vector_env import DmControlSuiteVectorEnvV0
+        >>> envs = DmControlSuiteVectorEnvV0("cartpole", "balance", num_envs=64)
+        >>> obs, info = envs.reset(seed=42)
+        >>> obs, rewards, terminations, truncations, info = envs.step(envs.action_space.sample())
+
+    Note:
+        The `info` contains the batched `"timestep.discount"` and `"timestep.step_type"` for every sub-environment.
+    """
+
+    metadata = {
+        "render_modes": ["rgb_array", "depth_array"],
+        "autoreset_mode": AutoresetMode.NEXT_STEP,
+    }
+
+    def __init__(
+        self,
+        domain_name: str,
+        task_name: str,
+        num_envs: int,
+        task_kwargs: dict[str, Any] | None = None,
+        environment_kwargs: dict[str, Any] | None = None,
+        visualize_reward: bool = False,
+        render_mode: str | None = None,
+        render_kwargs: dict[str, Any] | None = None,
+        flatten_observation: bool = False,
+        copy: bool = True,
+        autoreset_mode: str | AutoresetMode = AutoresetMode.NEXT_STEP,
+    ):
+        """Loads the dm-control suite environments, see :func:`shimmy.utils.dm_control.load_dm_control_suite`.
+
+        Args:
+            domain_name (str): name of the suite domain, e.g., "cartpole"
+            task_name (str): name of the domain task, e.g., "balance"
+            num_envs (int): number of sub-environments
+            task_kwargs (Optional[dict[str, Any]]): keyword arguments for the task
+            environment_kwargs (Optional[dict[str, Any]]): keyword arguments for the control environment
+            visualize_reward (bool): if to visualize the reward in the rendering
+            render_mode (Optional[str]): rendering mode (options: "rgb_array", "depth_array")
+            render_kwargs (Optional[dict[str, Any]]): Additional keyword arguments for rendering, see :class:`shimmy.DmControlCompatibilityV0`
+            flatten_observation (bool): If to return observations as a flat float32 `Box` per sub-environment rather than a `Dict`
+            copy (bool): If to return a copy of the batched observations, otherwise the observation buffers are returned and overwritten by the next step
+            autoreset_mode (str | AutoresetMode): The autoreset mode used, either next-step or disabled
+        """
+        super().__init__()
+
+        self.autoreset_mode = check_autoreset_mode(autoreset_mode)
+        self.metadata = dict(self.metadata)
+        self.metadata["autoreset_mode"] = self.autoreset_mode
+
+        assert render_mode is None or render_mode in self.metadata["render_modes"]
+        self.render_mode = render_mode
+        self.render_kwargs = {} if render_kwargs is None else render_kwargs
+
+        self.num_envs = num_envs
+        self.envs: list[control.Environment] = [
+            load_dm_control_suite(
+                domain_name=domain_name,
+                task_name=task_name,
+                task_kwargs=task_kwargs,
+                environment_kwargs=environment_kwargs,
+                visualize_reward=visualize_reward,
+            )
+            for _ in range(num_envs)
+        ]
+        self.metadata["render_fps"] = self.envs[0].control_timestep() * 1000
+
+        observation_spec = self.envs[0].observation_spec()
+        self.single_action_space = dm_spec2gym_space(self.envs[0].action_spec())
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self.flatten_observation = flatten_observation
+        self.copy = copy
+        if self.flatten_observation:
+            self.single_observation_space = DmFlatObsConverter(observation_spec).space
+            self.observation_space = batch_space(
+                self.single_observation_space, num_envs
+            )
+            self._observations = create_empty_array(
+                self.single_observation_space, n=num_envs, fn=np.zeros
+            )
+            self._obs_converters = [
+                DmFlatObsConverter(observation_spec, buffer=self._observations[i])
+                for i in range(num_envs)
+            ]
+        else:
+            self.single_observation_space = dm_spec2gym_space(observation_spec)
+            self.observation_space = batch_space(
+                self.single_observation_space, num_envs
+            )
+            self._observations = create_empty_array(
+                self.single_observation_space, n=num_envs, fn=np.zeros
+            )
+
+            # For each sub-environment, the observation leaves with the view of their batched buffer
+            converter = DmObsConverter(observation_spec)
+            self._obs_views: list[list[tuple[tuple[str, ...], str, np.ndarray]]] = []
+            for i in range(num_envs):
+                views = []
+                for path, key, _, _ in converter.entries:
+                    buffer = self._observations
+                    for parent_key in path:
+                        buffer = buffer[parent_key]
+                    views.append((path, key, buffer[key][i, ...]))
+                self._obs_views.append(views)
+
+        self._rewards = np.zeros((num_envs,), dtype=np.float64)
+        self._terminations = np.zeros((num_envs,), dtype=np.bool_)
+        self._truncations = np.zeros((num_envs,), dtype=np.bool_)
+        self._discounts = np.zeros((num_envs,), dtype=np.float64)
+        self._step_types = np.zeros((num_envs,), dtype=np.int64)
+        self._autoreset_envs = np.zeros((num_envs,), dtype=np.bool_)
+
+    def _write_timestep(self, i: int, timestep: dm_env.TimeStep):
+        """Writes the timestep of the i-th sub-environment into the batched buffers."""
+        if self.flatten_observation:
+            self._obs_converters[i](timestep.observation)
+        else:
+            for path, key, view in self._obs_views[i]:
+                value = timestep.observation
+                for parent_key in path:
+                    value = value[parent_key]
+                np.copyto(view, value[key], casting="unsafe")
+
+        self._rewards[i] = timestep.reward or 0
+        self._discounts[i] = timestep.discount or 0
+        self._step_types[i] = timestep.step_type
+
+        # https://github.com/deepmind/dm_env/blob/master/docs/index.md#example-sequences
+        last = timestep.last()
+        self._terminations[i] = last and not timestep.discount > 0
+        self._truncations[i] = last and timestep.discount > 0
+
+    def _info(self) -> dict[str, Any]:
+        """Returns the batched timestep info."""
+        return {
+            "timestep.discount": np.copy(self._discounts),
+            "timestep.step_type": np.copy(self._step_types),
+        }
+
+    def reset(
+        self,
+        *,
+        seed: int | list[int | None] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[ObsType, dict[str, Any]]:
+        """Resets the sub-environments.
+
+        Args:
+            seed: Seeds for the sub-environments, either `None`, an int (`[seed, seed+1, ..., seed+n]`) or a list of seeds
+            options: If `options["reset_mask"]` is provided, only the sub-environments selected by the boolean mask are reset
+
+        Returns:
+            The batched observations and info
+        """
+        seed, reset_mask = vector_reset_args(self, seed, options)
+
+        for i in np.flatnonzero(reset_mask):
+            if seed[i] is not None:
+                self.envs[i].task._random = np.random.RandomState(seed=seed[i])
+            self._write_timestep(i, self.envs[i].reset())
+        self._autoreset_envs[reset_mask] = False
+
+        return self._returned_observations(), self._info()
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[ObsType, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """Steps through the sub-environments, autoresetting the sub-environments that ended on the previous step.
+
+        Args:
+            actions: The batched actions
+
+        Returns:
+            The batched observations, rewards, terminations, truncations and info
+        """
+        for i, env in enumerate(self.envs):
+            if self._autoreset_envs[i]:
+                assert (
+                    self.autoreset_mode is AutoresetMode.NEXT_STEP
+                ), "The sub-environment must be reset with `options['reset_mask']` when autoreset is disabled."
+                self._write_timestep(i, env.reset())
+            else:
+                self._write_timestep(i, env.step(actions[i]))
+
+        np.logical_or(self._terminations, self._truncations, out=self._autoreset_envs)
+
+        return (
+            self._returned_observations(),
+            np.copy(self._rewards),
+            np.copy(self._terminations),
+            np.copy(self._truncations),
+            self._info(),
+        )
+
+    def _returned_observations(self) -> ObsType:
+        """Returns the batched observations buffer or a copy of it."""
+        return deepcopy(self._observations) if self.copy else self._observations
+
+    def render(self) -> tuple[np.ndarray, ...] | None:
+        """Renders the sub-environments."""
+        if self.render_mode == "rgb_array":
+            return tuple(env.physics.render(**self.render_kwargs) for env in self.envs)
+        elif self.render_mode == "depth_array":
+            return tuple(
+                env.physics.render(depth=True, **self.render_kwargs)
+                for env in self.envs
+            )
+
+    def close_extras(self, **kwargs: Any):
+        """Closes the sub-environments."""
+        for env in self.envs:
+            env.physics.free()
+            env.close()
+
+
+class _SharedMemoryBuffers:
+    """The batched observation, action and timestep arrays laid out in a single shared memory block.
+
+    The layout is computed from the (`dm_spec2gym_space`) observation and action spaces, such that the main process
+    and the workers compute the same array offsets independently. Without a buffer, only the number of bytes is computed.
+    """
+
+    alignment = 64
+
+    def __init__(
+        self,
+        observation_space: spaces.Space,
+        action_space: spaces.Space,
+        num_envs: int,
+        buffer: memoryview | None = None,
+    ):
+        self._buffer = buffer
+        self.nbytes = 0
+        self.num_envs = num_envs
+
+        self.observations = self._observation_arrays(observation_space)
+        self.actions = self._array(action_space.shape, action_space.dtype)
+        self.rewards = self._array((), np.float64)
+        self.terminations = self._array((), np.bool_)
+        self.truncations = self._array((), np.bool_)
+        self.discounts = self._array((), np.float64)
+        self.step_types = self._array((), np.int64)
+
+    def _observation_arrays(self, space: spaces.Space) -> Any:
+        if isinstance(space, spaces.Dict):
+            return {
+                key: self._observation_arrays(subspace)
+                for key, subspace in space.spaces.items()
+            }
+        return self._array(space.shape, space.dtype)
+
+    def _array(self, shape: tuple[int, ...] | None, dtype: Any) -> Any:
+        assert shape is not None and dtype is not None
+        offset = -(-self.nbytes // self.alignment) * self.alignment
+        dtype = np.dtype(dtype)
+        batch_shape = (self.num_envs,) + tuple(shape)
+        self.nbytes = offset + int(np.prod(batch_shape, dtype=int)) * dtype.itemsize
+
+        if self._buffer is None:
+            return None
+        return np.ndarray(batch_shape, dtype=dtype, buffer=self._buffer, offset=offset)
+
+    def observation_leaves(self) -> Iterator[tuple[tuple[str, ...], np.ndarray]]:
+        """Yields the key path and batched array of every observation leaf."""
+        stack: list[tuple[tuple[str, ...], Any]] = [((), self.observations)]
+        while stack:
+            path, arrays = stack.pop()
+            if isinstance(arrays, dict):
+                stack.extend((path + (key,), value) for key, value in arrays.items())
+            else:
+                yield path, arrays
+
+
+class DmControlAsyncVectorEnvV0(VectorEnv[ObsType, np.ndarray, np.ndarray]):
+    """A vector environment that runs :class:`shimmy.DmControlCompatibilityV0` environments in worker processes, sharing the observations through shared memory.
+
+    MuJoCo physics is single-threaded per environment, therefore, each sub-environment is stepped in its own process.
+    Unlike :class:`gymnasium.vector.AsyncVectorEnv`, nothing but the command is sent between the main process and workers.
+    The actions, observations, rewards, terminations, truncations, discounts and step types are all written into
+    a single :class:`multiprocessing.shared_memory.SharedMemory` block, laid out from the sub-environment spaces.
+    In particular, the info with the timestep's `StepType` is not pickled every step.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from shimmy.dm_control_vector_env import DmControlAsyncVectorEnvV0
+        >>> envs = DmControlAsyncVectorEnvV0([lambda: gym.make("dm_control/cheetah-run-v0").unwrapped for _ in range(8)])
+        >>> obs, info = envs.reset(seed=42)
+        >>> obs, rewards, terminations, truncations, info = envs.step(envs.action_space.sample())
+
+    Note:
+        The `info` contains the batched `"timestep.discount"` and `"timestep.step_type"` for every sub-environment.
+    """
+
+    metadata = {"autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], Any]],
+        copy: bool = True,
+        context: str | None = None,
+        autoreset_mode: str | AutoresetMode = AutoresetMode.NEXT_STEP,
+    ):
+        """Starts a worker process for each sub-environment.
+
+        Args:
+            env_fns (Sequence[Callable[[], DmControlCompatibilityV0]]): Functions that create the sub-environments, called in the worker processes
+            copy (bool): If to return a copy of the batched observations, otherwise the shared memory arrays are returned and overwritten by the next step
+            context (Optional[str]): The multiprocessing start method, "fork", "spawn" or "forkserver", uses the default start method if None
+            autoreset_mode (str | AutoresetMode): The autoreset mode used, either next-step or disabled
+        """
+        super().__init__()
+
+        self.autoreset_mode = check_autoreset_mode(autoreset_mode)
+        self.metadata = dict(self.metadata)
+        self.metadata["autoreset_mode"] = self.autoreset_mode
+
+        self.num_envs = len(env_fns)
+        self.copy = copy
+        self._shared_memory: SharedMemory | None = None
+        self.parent_pipes: list[Connection] = []
+        self.processes: list[multiprocessing.process.BaseProcess] = []
+
+        # the workers must share the resource tracker of the main process, otherwise a worker's tracker unlinks the shared memory on exit
+        resource_tracker.ensure_running()
+        # the started workers are closed if any worker fails to start, or the sub-environment spaces don't match
+        try:
+            ctx = multiprocessing.get_context(context)
+            for index, env_fn in enumerate(env_fns):
+                parent_pipe, child_pipe = ctx.Pipe()
+                process = ctx.Process(
+                    target=_dm_control_worker,
+                    name=f"Worker<{type(self).__name__}>-{index}",
+                    args=(
+                        index,
+                        CloudpickleWrapper(env_fn),
+                        child_pipe,
+                        parent_pipe,
+                        self.num_envs,
+                        self.autoreset_mode,
+                    ),
+                    daemon=True,
+                )
+                self.parent_pipes.append(parent_pipe)
+                self.processes.append(process)
+                process.start()
+                child_pipe.close()
+
+            # The workers send their spaces once, which are used to lay out the shared memory
+            worker_spaces = self._receive()
+            self.single_observation_space, self.single_action_space = worker_spaces[0]
+            for observation_space, action_space in worker_spaces:
+                if (
+                    observation_space != self.single_observation_space
+                    or action_space != self.single_action_space
+                ):
+                    raise RuntimeError(
+                        f"The sub-environment spaces are not equivalent, observation_space={observation_space}, action_space={action_space}, "
+                        f"single_observation_space={self.single_observation_space}, single_action_space={self.single_action_space}"
+                    )
+            self.observation_space = batch_space(
+                self.single_observation_space, self.num_envs
+            )
+            self.action_space = batch_space(self.single_action_space, self.num_envs)
+
+            nbytes = _SharedMemoryBuffers(
+                self.single_observation_space, self.single_action_space, self.num_envs
+            ).nbytes
+            self._shared_memory = SharedMemory(create=True, size=nbytes)
+            self._buffers = _SharedMemoryBuffers(
+                self.single_observation_space,
+                self.single_action_space,
+                self.num_envs,
+                self._shared_memory.buf,
+            )
+            for pipe in self.parent_pipes:
+                pipe.send(("attach", self._shared_memory.name))
+            self._receive()
+        except BaseException:
+            self.close()
+            raise
+
+        self._autoreset_envs = np.zeros((self.num_envs,), dtype=np.bool_)
+
+    def _receive(self, indices: Sequence[int] | None = None) -> list[Any]:
+        """Receives a reply from each worker, raising an error if any of the workers failed."""
+        if indices is None:
+            indices = range(self.num_envs)
+
+        results, errors = [], []
+        for index in indices:
+            status, data = self.parent_pipes[index].recv()
+            if status == "error":
+                errors.append(f"Worker {index}: {data}")
+            results.append(data)
+
+        if errors:
+            raise RuntimeError("\n".join(errors))
+        return results
+
+    def _info(self) -> dict[str, Any]:
+        """Returns the batched timestep info."""
+        return {
+            "timestep.discount": np.copy(self._buffers.discounts),
+            "timestep.step_type": np.copy(self._buffers.step_types),
+        }
+
+    def _returned_observations(self) -> ObsType:
+        """Returns the shared observation arrays or a copy of them."""
+        observations = self._buffers.observations
+        return deepcopy(observations) if self.copy else observations
+
+    def reset(
+        self,
+        *,
+        seed: int | list[int | None] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[ObsType, dict[str, Any]]:
+        """Resets the sub-environments.
+
+        Args:
+            seed: Seeds for the sub-environments, either `None`, an int (`[seed, seed+1, ..., seed+n]`) or a list of seeds
+            options: If `options["reset_mask"]` is provided, only the sub-environments selected by the boolean mask are reset, other options are sent to the sub-environments
+
+        Returns:
+            The batched observations and info
+        """
+        seed, reset_mask = vector_reset_args(self, seed, options)
+        options = {} if options is None else dict(options)
+        options.pop("reset_mask", None)
+
+        indices = np.flatnonzero(reset_mask)
+        for index in indices:
+            self.parent_pipes[index].send(("reset", (seed[index], options or None)))
+        self._receive(indices)
+        self._autoreset_envs[reset_mask] = False
+
+        return self._returned_observations(), self._info()
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[ObsType, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """Steps through the sub-environments, autoresetting the sub-environments that ended on the previous step.
+
+        Args:
+            actions: The batched actions
+
+        Returns:
+            The batched observations, rewards, terminations, truncations and info
+        """
+        assert (
+            self.autoreset_mode is AutoresetMode.NEXT_STEP
+            or not self._autoreset_envs.any()
+        ), "The sub-environments must be reset with `options['reset_mask']` when autoreset is disabled."
+
+        np.copyto(self._buffers.actions, actions, casting="unsafe")
+        for pipe in self.parent_pipes:
+            pipe.send(("step", None))
+        self._receive()
+
+        np.logical_or(
+            self._buffers.terminations,
+            self._buffers.truncations,
+            out=self._autoreset_envs,
+        )
+
+        return (
+            self._returned_observations(),
+            np.copy(self._buffers.rewards),
+            np.copy(self._buffers.terminations),
+            np.copy(self._buffers.truncations),
+            self._info(),
+        )
+
+    def close_extras(self, **kwargs: Any):
+        """Closes the worker processes and releases the shared memory."""
+        for pipe, process in zip(self.parent_pipes, self.processes):
+            if process.is_alive():
+                try:
+                    pipe.send(("close", None))
+                    pipe.recv()
+                except (OSError, EOFError):
+                    pass
+            pipe.close()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        if self._shared_memory is not None:
+            # the arrays must be released before closing the shared memory, unless still referenced with `copy=False`
+            self._buffers = None
+            try:
+                self._shared_memory.close()
+            except BufferError:
+                pass
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+
+def _dm_control_worker(
+    index: int,
+    env_fn: CloudpickleWrapper,
+    pipe: Connection,
+    parent_pipe: Connection,
+    num_envs: int,
+    autoreset_mode: AutoresetMode,
+):
+    """The worker process of :class:`DmControlAsyncVectorEnvV0` which writes its sub-environment results into the shared memory."""
+    parent_pipe.close()
+
+    env, shared_memory, buffers = None, None, None
+    try:
+        env = env_fn()
+        pipe.send(("ok", (env.observation_space, env.action_space)))
+
+        command, shared_memory_name = pipe.recv()
+        assert command == "attach", command
+        shared_memory = SharedMemory(name=shared_memory_name)
+        buffers = _SharedMemoryBuffers(
+            env.observation_space, env.action_space, num_envs, shared_memory.buf
+        )
+        observation_views = [
+            (path, array[index, ...]) for path, array in buffers.observation_leaves()
+        ]
+        pipe.send(("ok", None))
+
+        def write(obs, reward, terminated, truncated, info):
+            for path, view in observation_views:
+                value = obs
+                for key in path:
+                    value = value[key]
+                np.copyto(view, value, casting="unsafe")
+            buffers.rewards[index] = reward
+            buffers.terminations[index] = terminated
+            buffers.truncations[index] = truncated
+            buffers.discounts[index] = info.get("timestep.discount") or 0
+            buffers.step_types[index] = info.get("timestep.step_type", 0)
+
+        autoreset = False
+        while True:
+            command, data = pipe.recv()
+            if command == "reset":
+                seed, options = data
+                obs, info = env.reset(seed=seed, options=options)
+                write(obs, 0, False, False, info)
+                autoreset = False
+                pipe.send(("ok", None))
+            elif command == "step":
+                if autoreset:
+                    obs, info = env.reset()
+                    write(obs, 0, False, False, info)
+                    autoreset = False
+                else:
+                    obs, reward, terminated, truncated, info = env.step(
+                        buffers.actions[index]
+                    )
+                    write(obs, reward, terminated, truncated, info)
+                    autoreset = autoreset_mode is AutoresetMode.NEXT_STEP and (
+                        terminated or truncated
+                    )
+                pipe.send(("ok", None))
+            elif command == "close":
+                pipe.send(("ok", None))
+                break
+            else:
+                raise RuntimeError(f"Received unknown command `{command}`.")
+    except (KeyboardInterrupt, Exception):
+        pipe.send(("error", traceback.format_exc()))
+    finally:
+        observation_views, buffers = None, None
+        if shared_memory is not None:
+            shared_memory.close()
+        if env is not None:
+            env.close()
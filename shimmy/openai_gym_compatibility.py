@@ -25,6 +25,8 @@ from gymnasium.utils.step_api_compatibility import (
     convert_to_terminated_truncated_step_api,
 )
 
+from shimmy.utils.instrumentation import DISABLED_STEP_TIMER, StepTimer
+
 try:
     import gym
     import gym.wrappers
@@ -44,6 +46,9 @@ class GymV26CompatibilityV0(gymnasium.Env[ObsType, ActType]):
     In 2022, the team that has been maintaining Gym has moved all future development to Gymnasium.
     """
 
+    # If assigned, records the time of each step in the gym environment, as the step is returned unconverted
+    step_timer: StepTimer | None = None
+
     def __init__(
         self,
         env_id: str | None = None,
@@ -114,7 +119,14 @@ class GymV26CompatibilityV0(gymnasium.Env[ObsType, ActType]):
         Returns:
             (observation, reward, terminated, truncated, info)
         """
-        return self.gym_env.step(action)
+        step_timer = self.step_timer or DISABLED_STEP_TIMER
+        step_timer.start()
+
+        step_returns = self.gym_env.step(action)
+        step_timer.lap("env")
+        step_timer.stop()
+
+        return step_returns
 
     def render(self):
         """Renders the environment.
@@ -168,6 +180,9 @@ class GymV21CompatibilityV0(gymnasium.Env[ObsType, ActType]):
     - Environments that use `self.np_random` might not work as expected.
     """
 
+    # If assigned, records the time of each step in the gym environment, the rendering and the conversion to the terminated and truncated step API
+    step_timer: StepTimer | None = None
+
     def __init__(
         self,
         env_id: str | None = None,
@@ -251,12 +266,23 @@ class GymV21CompatibilityV0(gymnasium.Env[ObsType, ActType]):
         Returns:
             (observation, reward, terminated, truncated, info)
         """
+        step_timer = self.step_timer or DISABLED_STEP_TIMER
+        step_timer.start()
+
         obs, reward, done, info = self.gym_env.step(action)
+        step_timer.lap("env")
 
         if self.render_mode is not None:
             self.render()
+        step_timer.lap("render")
+
+        step_returns = convert_to_terminated_truncated_step_api(
+            (obs, reward, done, info)
+        )
+        step_timer.lap("conversion")
+        step_timer.stop()
 
-        return convert_to_terminated_truncated_step_api((obs, reward, done, info))
+        return step_returns
 
     def render(self) -> Any:
         """Renders the environment.
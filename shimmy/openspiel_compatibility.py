@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import functools
 import string
 from typing import Any, Dict, Optional
 
@@ -13,6 +14,38 @@ from gymnasium import spaces
 from gymnasium.utils import EzPickle, seeding
 from pettingzoo.utils.env import AgentID
 
+from shimmy.utils.instrumentation import DISABLED_STEP_TIMER, StepTimer
+
+# The games with a `seed` game parameter, that are reloaded on reset with a new seed
+_SEED_PARAMETER_GAMES = ("deep_sea", "hanabi", "mfg_garnet")
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_load_game(
+    game_name: str, config: tuple[tuple[str, Any], ...]
+) -> pyspiel.Game:
+    """Loads the game, caching the most recently loaded games as games are immutable and can be shared."""
+    return pyspiel.load_game(game_name, dict(config))
+
+
+def _load_game(game_name: str, config: dict | None = None) -> pyspiel.Game:
+    """Loads the game with the config, reusing a previously loaded game with the same name and config.
+
+    Args:
+        game_name: The OpenSpiel game name
+        config: The game parameters
+
+    Returns:
+        The loaded game
+    """
+    if config is None:
+        return _cached_load_game(game_name, ())
+    try:
+        return _cached_load_game(game_name, tuple(sorted(config.items())))
+    except TypeError:
+        # unhashable game parameters, e.g., the parameters of a nested game
+        return pyspiel.load_game(game_name, config)
+
 
 class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
     """This compatibility wrapper converts an OpenSpiel environment into a PettingZoo environment.
@@ -30,12 +63,18 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
         "is_parallelizable": False,
     }
 
+    # If assigned, records the time of each step applying the action and chance outcomes in the game and the conversion, updating the masks,
+    # observations and rewards, the step does not render
+    step_timer: StepTimer | None = None
+
     def __init__(
         self,
         env: pyspiel.Game | None = None,
         game_name: str | None = None,
         render_mode: str | None = None,
         config: dict | None = None,
+        persistent_action_masks: bool = False,
+        lazy_observations: bool = False,
     ):
         """Wrapper to convert a OpenSpiel environment into a PettingZoo environment.
 
@@ -44,11 +83,26 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
             game_name (Optional[str]): name of OpenSpiel game to load
             render_mode (Optional[str]): rendering mode
             config (Optional[dict]): PySpiel config
+            persistent_action_masks (bool): If to keep one info dict and `"action_mask"` per agent, updated in place on every step,
+                rather than new ones. The update is proportional to the number of legal actions, however a stored mask is
+                overwritten by the next step, copy the mask if it needs to be kept, e.g., in a replay buffer.
+            lazy_observations (bool): If to compute an agent's observation on `observe`, memoized until the game state changes,
+                rather than the observations of all agents on every step. The tensor observations are read-only and
+                at the end of an episode, the observations are of the terminal game state rather than the last non-terminal state.
         """
-        EzPickle.__init__(self, env, game_name, render_mode)
+        EzPickle.__init__(
+            self,
+            env,
+            game_name,
+            render_mode,
+            persistent_action_masks=persistent_action_masks,
+            lazy_observations=lazy_observations,
+        )
         super().__init__()
 
         self.config = config
+        self.persistent_action_masks = persistent_action_masks
+        self.lazy_observations = lazy_observations
 
         # Only one of game_name and env can be provided, the other should be None
         if env is None and game_name is None:
@@ -60,12 +114,11 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
                 "Two environments provided. Use `env` to specify an existing environment, or load an environment with `game_name`."
             )
         elif game_name is not None:
-            if self.config is not None:
-                self._env = pyspiel.load_game(game_name, self.config)
-            else:
-                self._env = pyspiel.load_game(game_name)
+            self._env = _load_game(game_name, self.config)
         elif env is not None:
             self._env = env
+        # The game reused by the resets, unless a game with a seed parameter is reset with a seed
+        self._default_env = self._env
 
         self.possible_agents = [
             "player_" + str(r) for r in range(self._env.num_players())
@@ -83,6 +136,11 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
 
         self.observation_spaces = {}
         self.action_spaces = {}
+        # The game configurations, `str(game)`, that the observation and action spaces were built for
+        self._observation_spaces_game: str | None = None
+        self._action_spaces_game: str | None = None
+        # The observations of the agents, with `lazy_observations` only those computed since the game state last changed
+        self._observations: dict[AgentID, Any] = {}
 
         self._update_observation_spaces()
         self._update_action_spaces()
@@ -90,6 +148,12 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
         self.render_mode = render_mode
 
     def _update_observation_spaces(self):
+        """Builds the observation spaces if the game configuration changed since they were last built."""
+        game = str(self._env)
+        if game == self._observation_spaces_game:
+            return
+        self._observation_spaces_game = game
+
         for agent in self.possible_agents:
             if self.game_type.provides_observation_tensor:
                 self.observation_spaces[agent] = spaces.Box(
@@ -118,6 +182,12 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
                 )
 
     def _update_action_spaces(self):
+        """Builds the action spaces if the game configuration changed since they were last built."""
+        game = str(self._env)
+        if game == self._action_spaces_game:
+            return
+        self._action_spaces_game = game
+
         for agent in self.possible_agents:
             try:
                 self.action_spaces[agent] = spaces.Discrete(
@@ -128,6 +198,19 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
                     f"{str(e)[:-1]} for action space for {self._env}."
                 )
 
+        # The action mask of each agent, updated in place if `persistent_action_masks`, with the legal actions of the agent
+        self._action_masks = {
+            agent: np.zeros(self._env.num_distinct_actions(), dtype=np.int8)
+            for agent in self.possible_agents
+        }
+        self._action_mask_infos = {
+            agent: {"action_mask": action_mask}
+            for agent, action_mask in self._action_masks.items()
+        }
+        self._legal_actions: dict[AgentID, list[int]] = {
+            agent: [] for agent in self.possible_agents
+        }
+
     def observation_space(self, agent: AgentID):
         """observation_space.
 
@@ -175,13 +258,30 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
     def observe(self, agent: AgentID) -> Any:
         """observe.
 
+        With `lazy_observations`, the observation is computed from the game state on the first call
+        after the game state changed, and memoized for the following calls.
+
         Args:
             agent (AgentID): agent
 
         Returns:
             observation (Any)
         """
-        return self.observations[agent]
+        observation = self._observations.get(agent)
+        if observation is None:
+            observation = self._compute_observation(agent)
+            if isinstance(observation, np.ndarray):
+                # the memoized observation is returned on every call, such that it must not be modified
+                observation.setflags(write=False)
+            self._observations[agent] = observation
+        return observation
+
+    @property
+    def observations(self) -> dict[AgentID, Any]:
+        """The observations of all agents, with `lazy_observations` computing those that are not memoized."""
+        if not self.lazy_observations:
+            return self._observations
+        return {agent: self.observe(agent) for agent in self.possible_agents}
 
     def close(self):
         """close."""
@@ -203,19 +303,16 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
 
         self.game_name = self.game_type.short_name
 
-        # seed argument is only valid for three games
-        if self.game_name in ["deep_sea", "hanabi", "mfg_garnet"] and seed is not None:
+        # seed argument is only valid for three games, otherwise the loaded game is reused
+        if self.game_name in _SEED_PARAMETER_GAMES and seed is not None:
             if self.config is not None:
                 reset_config = self.config.copy()
                 reset_config["seed"] = seed
             else:
                 reset_config = {"seed": seed}
-            self._env = pyspiel.load_game(self.game_name, reset_config)
+            self._env = _load_game(self.game_name, reset_config)
         else:
-            if self.config is not None:
-                self._env = pyspiel.load_game(self.game_name, self.config)
-            else:
-                self._env = pyspiel.load_game(self.game_name)
+            self._env = self._default_env
 
         # all agents
         self.agents = self.possible_agents[:]
@@ -322,7 +419,7 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
             # find agents for whom we don't have actions yet if simultaneous node
             for agent in self.agents:
                 if agent not in self.simultaneous_actions:
-                    if np.sum(self.infos[agent]["action_mask"]) != 0:
+                    if self._legal_actions[agent]:
                         self.agent_selection = agent
                         return
                     else:
@@ -337,46 +434,59 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
         ]
 
     def _update_observations(self):
-        """Updates all the observations inside the observations dictionary."""
+        """Updates all the observations inside the observations dictionary.
+
+        With `lazy_observations`, the memoized observations are cleared instead, the observations are computed on `observe`.
+        """
+        if self.lazy_observations:
+            self._observations = {}
+            return
+
         if self.game_state.is_terminal():
             return
 
+        self._observations = {
+            agent: self._compute_observation(agent) for agent in self.possible_agents
+        }
+
+    def _compute_observation(self, agent: AgentID) -> Any:
+        """Computes the observation of the agent from the current game state."""
+        player = self.agent_name_id_mapping[agent]
         if self.game_type.provides_observation_tensor:
-            self.observations = {
-                self.agents[i]: np.array(self.game_state.observation_tensor(i)).reshape(
-                    self.observation_space(self.agents[i]).shape
-                )
-                for i in self.agent_ids
-            }
+            return np.array(self.game_state.observation_tensor(player)).reshape(
+                self.observation_space(agent).shape
+            )
         elif self.game_type.provides_information_state_tensor:
-            self.observations = {
-                self.agents[i]: np.array(
-                    self.game_state.information_state_tensor(i)
-                ).reshape(self.observation_space(self.agents[i]).shape)
-                for i in self.agent_ids
-            }
+            return np.array(self.game_state.information_state_tensor(player)).reshape(
+                self.observation_space(agent).shape
+            )
         elif self.game_type.provides_observation_string:
-            self.observations = {
-                self.agents[i]: self.game_state.observation_string(i)
-                for i in self.agent_ids
-            }
+            return self.game_state.observation_string(player)
         elif self.game_type.provides_information_state_string:
-            self.observations = {
-                self.agents[i]: self.game_state.information_state_string(i)
-                for i in self.agent_ids
-            }
+            return self.game_state.information_state_string(player)
         else:
             raise NotImplementedError(
                 f"No information/observation tensor/string implemented for {self._env}."
             )
 
     def _update_action_masks(self):
-        """Updates all the action masks inside the infos dictionary."""
-        for agent_id, agent_name in zip(self.agent_ids, self.agents):
-            action_mask = np.zeros(self._env.num_distinct_actions(), dtype=np.int8)
-            action_mask[self.game_state.legal_actions(agent_id)] = 1
+        """Updates all the action masks inside the infos dictionary.
 
-            self.infos[agent_name] = {"action_mask": action_mask}
+        With `persistent_action_masks`, the masks are updated in place, clearing the previous legal actions,
+        such that the update is proportional to the number of legal actions rather than the number of actions.
+        """
+        for agent_id, agent_name in zip(self.agent_ids, self.agents):
+            legal_actions = self.game_state.legal_actions(agent_id)
+            if self.persistent_action_masks:
+                action_mask = self._action_masks[agent_name]
+                action_mask[self._legal_actions[agent_name]] = 0
+                action_mask[legal_actions] = 1
+                self.infos[agent_name] = self._action_mask_infos[agent_name]
+            else:
+                action_mask = np.zeros(self._env.num_distinct_actions(), dtype=np.int8)
+                action_mask[legal_actions] = 1
+                self.infos[agent_name] = {"action_mask": action_mask}
+            self._legal_actions[agent_name] = legal_actions
 
     def _update_rewards(self):
         """Updates all the _cumulative_rewards of the environment."""
@@ -390,13 +500,9 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
         if self.game_state.current_player() <= -4:
             self.terminations = {a: True for a in self.agents}
 
-        # check for action masks because OpenSpiel doesn't do it themselves
-        action_mask_sum = 0
-        for agent in self.agents:
-            action_mask_sum += np.sum(self.infos[agent]["action_mask"])
-
+        # check for legal actions because OpenSpiel doesn't do it themselves
         # if all actions are illegal for all agents, declare terminal
-        if action_mask_sum == 0:
+        if not any(self._legal_actions[agent] for agent in self.agents):
             self.terminations = {a: True for a in self.agents}
 
         # check for truncation
@@ -433,18 +539,19 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
         Args:
             action (int): action
         """
+        step_timer = self.step_timer or DISABLED_STEP_TIMER
+        step_timer.start()
+
         # reset the cumulative rewards for the current agent
         self._cumulative_rewards[self.agent_selection] = 0.0
 
         # handle the possibility of an end step
         if not self._end_routine():
-            # ensure observation and action spaces are up-to-date with the underlying environment
-            self._update_observation_spaces()
-            self._update_action_spaces()
-
-            # step the environment
+            # step the environment, the observation and action spaces only change when the game is loaded on reset
+            step_timer.lap("conversion")
             self._execute_action_node(action)
             self._execute_chance_node()
+            step_timer.lap("env")
             self._update_action_masks()
             self._update_observations()
             self._update_rewards()
@@ -455,3 +562,6 @@ class OpenSpielCompatibilityV0(pz.AECEnv, EzPickle):
 
         # accumulate the rewards
         self._accumulate_rewards()
+
+        step_timer.lap("conversion")
+        step_timer.stop()
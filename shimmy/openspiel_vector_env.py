@@ -0,0 +1,242 @@
+# pyright: reportGeneralTypeIssues=false
+"""Native vector environment for batches of OpenSpiel games."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pyspiel
+from gymnasium import spaces
+from gymnasium.utils import seeding
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from shimmy.openspiel_compatibility import _load_game
+from shimmy.utils.vector_env import check_autoreset_mode, vector_reset_args
+
+
+class OpenSpielVectorEnvV0(VectorEnv[np.ndarray, np.ndarray, np.ndarray]):
+    """A vector environment that plays a batch of independent states of the same sequential OpenSpiel game in lockstep.
+
+    Each step takes the action of the current player of every game, such that a policy shared by all players,
+    e.g., for self-play, is evaluated on the whole batch at once rather than one :class:`shimmy.OpenSpielCompatibilityV0`
+    agent step at a time. The observations are the current player's observation tensors (or information state tensors),
+    written into a batched buffer, with the batched action masks in the info.
+
+    Example:
+        >>> import numpy as np
+        >>> from shimmy.openspiel_vector_env import OpenSpielVectorEnvV0
+        >>> envs = OpenSpielVectorEnvV0(game_name="tic_tac_toe", num_envs=64)
+        >>> obs, info = envs.reset(seed=42)
+        >>> actions = [np.random.choice(np.flatnonzero(mask)) if mask.any() else 0 for mask in info["action_mask"]]
+        >>> obs, rewards, terminations, truncations, info = envs.step(actions)
+
+    Note:
+        The `info` contains the batched `"action_mask"` of the current players, the `"current_player"` of each game
+        and the `"rewards"` of all players, of shape `(num_envs, num_players)`, for the last transition.
+        The returned reward is the reward of the player that took the action. As OpenSpiel games end in terminal states,
+        the truncations are always false. When a game has ended, the observation is of the player that took the last action,
+        the current player is the terminal player id (`pyspiel.PlayerId.TERMINAL`) and the action mask is empty.
+        The game is reset on the next step, ignoring its action, such that any action, e.g., `0`, can be passed for it.
+    """
+
+    metadata = {
+        "render_modes": [],
+        "autoreset_mode": AutoresetMode.NEXT_STEP,
+    }
+
+    def __init__(
+        self,
+        env: pyspiel.Game | None = None,
+        game_name: str | None = None,
+        num_envs: int = 1,
+        config: dict | None = None,
+        copy: bool = True,
+        autoreset_mode: str | AutoresetMode = AutoresetMode.NEXT_STEP,
+    ):
+        """Loads the OpenSpiel game for the batch of game states.
+
+        Args:
+            env (Optional[pyspiel.Game]): existing OpenSpiel game to play
+            game_name (Optional[str]): name of OpenSpiel game to load
+            num_envs (int): number of games played in lockstep
+            config (Optional[dict]): PySpiel config
+            copy (bool): If to return a copy of the batched observations and action masks, otherwise the buffers are returned and overwritten by the next step
+            autoreset_mode (str | AutoresetMode): The autoreset mode used, either next-step or disabled
+        """
+        super().__init__()
+
+        self.autoreset_mode = check_autoreset_mode(autoreset_mode)
+        self.metadata = dict(self.metadata)
+        self.metadata["autoreset_mode"] = self.autoreset_mode
+
+        # Only one of game_name and env can be provided, the other should be None
+        if env is None and game_name is None:
+            raise ValueError(
+                "No environment provided. Use `env` to specify an existing environment, or load an environment with `game_name`."
+            )
+        elif env is not None and game_name is not None:
+            raise ValueError(
+                "Two environments provided. Use `env` to specify an existing environment, or load an environment with `game_name`."
+            )
+        elif game_name is not None:
+            self._env = _load_game(game_name, config)
+        elif env is not None:
+            self._env = env
+
+        self.game_type = self._env.get_type()
+        if self.game_type.dynamics != pyspiel.GameType.Dynamics.SEQUENTIAL:
+            raise ValueError(
+                f"Only sequential games are supported, {self.game_type.short_name} has {self.game_type.dynamics} dynamics."
+            )
+        if self.game_type.provides_observation_tensor:
+            self._observation_tensor = pyspiel.State.observation_tensor
+            observation_shape = self._env.observation_tensor_shape()
+        elif self.game_type.provides_information_state_tensor:
+            self._observation_tensor = pyspiel.State.information_state_tensor
+            observation_shape = self._env.information_state_tensor_shape()
+        else:
+            raise ValueError(
+                f"No information/observation tensor implemented for {self._env}, the batched observations require a tensor."
+            )
+
+        self.num_envs = num_envs
+        self.num_players = self._env.num_players()
+        self.copy = copy
+
+        self.single_observation_space = spaces.Box(
+            low=-np.inf, high=np.inf, shape=tuple(observation_shape), dtype=np.float64
+        )
+        self.single_action_space = spaces.Discrete(self._env.num_distinct_actions())
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        self.states: list[pyspiel.State] = [
+            self._env.new_initial_state() for _ in range(num_envs)
+        ]
+        self._np_randoms: list[np.random.Generator] = [
+            seeding.np_random()[0] for _ in range(num_envs)
+        ]
+
+        self._observations = np.zeros(
+            (num_envs,) + self.single_observation_space.shape, dtype=np.float64
+        )
+        # The flat view of each game's observation, that the observation tensors are written into
+        self._flat_observations = self._observations.reshape(num_envs, -1)
+        self._action_masks = np.zeros(
+            (num_envs, self.single_action_space.n), dtype=np.int8
+        )
+        # The legal actions set in each game's action mask, cleared on the next update
+        self._legal_actions: list[list[int]] = [[] for _ in range(num_envs)]
+        self._current_players = np.zeros((num_envs,), dtype=np.int64)
+        self._player_rewards = np.zeros((num_envs, self.num_players), dtype=np.float64)
+        self._rewards = np.zeros((num_envs,), dtype=np.float64)
+        self._terminations = np.zeros((num_envs,), dtype=np.bool_)
+        self._truncations = np.zeros((num_envs,), dtype=np.bool_)
+        self._autoreset_envs = np.zeros((num_envs,), dtype=np.bool_)
+
+    def _execute_chance_nodes(self, i: int):
+        """Samples the outcomes of the i-th game's chance nodes, the same as :class:`shimmy.OpenSpielCompatibilityV0`."""
+        state = self.states[i]
+        while state.is_chance_node():
+            action_list, prob_list = zip(*state.chance_outcomes())
+            state.apply_action(self._np_randoms[i].choice(action_list, p=prob_list))
+
+    def _write_state(self, i: int, acting_player: int):
+        """Writes the i-th game's state into the batched buffers."""
+        state = self.states[i]
+        current_player = state.current_player()
+        self._current_players[i] = current_player
+
+        observing_player = current_player if current_player >= 0 else acting_player
+        self._flat_observations[i] = self._observation_tensor(state, observing_player)
+
+        action_mask = self._action_masks[i]
+        action_mask[self._legal_actions[i]] = 0
+        legal_actions = state.legal_actions() if current_player >= 0 else []
+        action_mask[legal_actions] = 1
+        self._legal_actions[i] = legal_actions
+
+        self._player_rewards[i] = state.rewards()
+        self._rewards[i] = self._player_rewards[i, acting_player]
+        self._terminations[i] = state.is_terminal()
+
+    def _reset_state(self, i: int):
+        """Starts a new game for the i-th game state."""
+        self.states[i] = self._env.new_initial_state()
+        self._execute_chance_nodes(i)
+        self._write_state(i, max(self.states[i].current_player(), 0))
+        self._rewards[i] = 0.0
+
+    def _info(self) -> dict[str, Any]:
+        """Returns the batched action masks, current players and player rewards."""
+        return {
+            "action_mask": (
+                np.copy(self._action_masks) if self.copy else self._action_masks
+            ),
+            "current_player": np.copy(self._current_players),
+            "rewards": np.copy(self._player_rewards),
+        }
+
+    def reset(
+        self,
+        *,
+        seed: int | list[int | None] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[np.ndarray, dict[str, Any]]:
+        """Starts new games.
+
+        Args:
+            seed: Seeds for the chance outcomes of the games, either `None`, an int (`[seed, seed+1, ..., seed+n]`) or a list of seeds
+            options: If `options["reset_mask"]` is provided, only the games selected by the boolean mask are reset
+
+        Returns:
+            The batched observations and info
+        """
+        seed, reset_mask = vector_reset_args(self, seed, options)
+
+        for i in np.flatnonzero(reset_mask):
+            if seed[i] is not None:
+                self._np_randoms[i], _ = seeding.np_random(seed[i])
+            self._reset_state(i)
+        self._autoreset_envs[reset_mask] = False
+
+        return self._returned_observations(), self._info()
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """Applies the current player's action in every game, starting new games for those that ended on the previous step.
+
+        Args:
+            actions: The actions of the current players, the actions of games being reset are ignored
+
+        Returns:
+            The batched observations, rewards, terminations, truncations and info
+        """
+        for i, state in enumerate(self.states):
+            if self._autoreset_envs[i]:
+                assert (
+                    self.autoreset_mode is AutoresetMode.NEXT_STEP
+                ), "The game must be reset with `options['reset_mask']` when autoreset is disabled."
+                self._reset_state(i)
+            else:
+                acting_player = state.current_player()
+                state.apply_action(int(actions[i]))
+                self._execute_chance_nodes(i)
+                self._write_state(i, acting_player)
+
+        np.copyto(self._autoreset_envs, self._terminations)
+
+        return (
+            self._returned_observations(),
+            np.copy(self._rewards),
+            np.copy(self._terminations),
+            np.copy(self._truncations),
+            self._info(),
+        )
+
+    def _returned_observations(self) -> np.ndarray:
+        """Returns the batched observations buffer or a copy of it."""
+        return np.copy(self._observations) if self.copy else self._observations
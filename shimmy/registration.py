@@ -2,114 +2,122 @@
 
 from __future__ import annotations
 
-from functools import partial
-from typing import Any, Callable
+import contextlib
+import importlib
+import importlib.util
+from typing import Any
 
 import numpy as np
 from gymnasium.envs.registration import register, registry
 
 from shimmy.utils.envs_configs import (
+    DM_CONTROL_LOCOMOTION_ENVS,
     DM_CONTROL_MANIPULATION_ENVS,
     DM_CONTROL_SUITE_ENVS,
 )
 
 
-def _register_dm_control_envs():
-    """Registers all dm-control environments in gymnasium."""
-    try:
-        import dm_control
-    except ImportError:
-        return
+def _dm_control_model_cache(model_cache_dir: str | None):
+    """Returns the context manager caching the compiled models in `model_cache_dir`, if provided."""
+    if model_cache_dir is None:
+        return contextlib.nullcontext()
 
-    from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+    from shimmy.utils.dm_control import dm_control_model_cache
 
-    # Add generic environment support
-    def _make_dm_control_generic_env(env, **render_kwargs):
-        return DmControlCompatibilityV0(env, **render_kwargs)
+    return dm_control_model_cache(model_cache_dir)
 
-    register("dm_control/compatibility-env-v0", _make_dm_control_generic_env)
 
-    # Register all suite environments
-    import dm_control.suite
-
-    def _register_locomotion_envs():
-        try:
-            from dm_control import composer
-            from dm_control.locomotion.examples import basic_cmu_2019, basic_rodent_2020
-        except ImportError:
-            print(
-                "Warning, registration of `dm_control` locomotion envs has failed due to an ImportError"
-            )
-            return
-
-        def _make_dm_control_example_locomotion_env(
-            env_fn: Callable[[np.random.RandomState | None], composer.Environment],
-            random_state: np.random.RandomState | None = None,
-            **render_kwargs,
-        ):
-            return DmControlCompatibilityV0(env_fn(random_state), **render_kwargs)
-
-        for locomotion_env, nondeterministic in (
-            (basic_cmu_2019.cmu_humanoid_run_walls, False),
-            (basic_cmu_2019.cmu_humanoid_run_gaps, False),
-            (basic_cmu_2019.cmu_humanoid_go_to_target, False),
-            (basic_cmu_2019.cmu_humanoid_maze_forage, True),
-            (basic_cmu_2019.cmu_humanoid_heterogeneous_forage, True),
-            (basic_rodent_2020.rodent_escape_bowl, False),
-            (basic_rodent_2020.rodent_run_gaps, False),
-            (basic_rodent_2020.rodent_maze_forage, True),
-            (basic_rodent_2020.rodent_two_touch, True),
-            # (cmu_2020_tracking.cmu_humanoid_tracking, False),
-        ):
-            register(
-                f"dm_control/{locomotion_env.__name__.title().replace('_', '')}-v0",
-                partial(_make_dm_control_example_locomotion_env, env_fn=locomotion_env),
-                nondeterministic=nondeterministic,
-            )
-
-    def _make_dm_control_suite_env(
-        domain_name: str,
-        task_name: str,
-        task_kwargs: dict[str, Any] | None = None,
-        environment_kwargs: dict[str, Any] | None = None,
-        visualize_reward: bool = False,
-        **render_kwargs,
-    ):
-        """The entry_point function for registration of dm-control environments."""
-        env = dm_control.suite.load(
+def _make_dm_control_example_locomotion_env(
+    module_name: str,
+    env_fn_name: str,
+    random_state: np.random.RandomState | None = None,
+    model_cache_dir: str | None = None,
+    **render_kwargs,
+):
+    """The entry_point function for registration of dm-control locomotion example environments."""
+    from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+
+    module = importlib.import_module(f"dm_control.locomotion.examples.{module_name}")
+    env_fn = getattr(module, env_fn_name)
+    with _dm_control_model_cache(model_cache_dir):
+        env = env_fn(random_state)
+    return DmControlCompatibilityV0(env, **render_kwargs)
+
+
+def _make_dm_control_suite_env(
+    domain_name: str,
+    task_name: str,
+    task_kwargs: dict[str, Any] | None = None,
+    environment_kwargs: dict[str, Any] | None = None,
+    visualize_reward: bool = False,
+    model_cache_dir: str | None = None,
+    **render_kwargs,
+):
+    """The entry_point function for registration of dm-control environments."""
+    from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+    from shimmy.utils.dm_control import load_dm_control_suite
+
+    with _dm_control_model_cache(model_cache_dir):
+        env = load_dm_control_suite(
             domain_name=domain_name,
             task_name=task_name,
             task_kwargs=task_kwargs,
             environment_kwargs=environment_kwargs,
             visualize_reward=visualize_reward,
         )
-        return DmControlCompatibilityV0(env, **render_kwargs)
+    return DmControlCompatibilityV0(env, **render_kwargs)
+
+
+def _make_dm_control_manipulation_env(
+    env_name: str, model_cache_dir: str | None = None, **render_kwargs
+):
+    """The entry_point function for registration of dm-control manipulation environments."""
+    import dm_control.manipulation
+
+    from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+
+    with _dm_control_model_cache(model_cache_dir):
+        env = dm_control.manipulation.load(env_name)
+    return DmControlCompatibilityV0(env, **render_kwargs)
 
+
+def _register_dm_control_envs():
+    """Registers all dm-control environments in gymnasium.
+
+    The environments are registered with string entry points, such that dm-control and MuJoCo are only imported on `gymnasium.make`.
+    """
+    if importlib.util.find_spec("dm_control") is None:
+        return
+
+    # Add generic environment support
+    register(
+        "dm_control/compatibility-env-v0",
+        entry_point="shimmy.dm_control_compatibility:DmControlCompatibilityV0",
+    )
+
+    # Register all suite environments
     for _domain_name, _task_name in DM_CONTROL_SUITE_ENVS:
         register(
             f"dm_control/{_domain_name}-{_task_name}-v0",
-            partial(
-                _make_dm_control_suite_env,
-                domain_name=_domain_name,
-                task_name=_task_name,
-            ),
+            entry_point="shimmy.registration:_make_dm_control_suite_env",
+            kwargs=dict(domain_name=_domain_name, task_name=_task_name),
         )
 
     # Register all example locomotion environments
-    # Listed in https://github.com/deepmind/dm_control/blob/main/dm_control/locomotion/examples/examples_test.py
-    _register_locomotion_envs()
+    for module_name, env_fn_name, nondeterministic in DM_CONTROL_LOCOMOTION_ENVS:
+        register(
+            f"dm_control/{env_fn_name.title().replace('_', '')}-v0",
+            entry_point="shimmy.registration:_make_dm_control_example_locomotion_env",
+            kwargs=dict(module_name=module_name, env_fn_name=env_fn_name),
+            nondeterministic=nondeterministic,
+        )
 
     # Register all manipulation environments
-    import dm_control.manipulation
-
-    def _make_dm_control_manipulation_env(env_name: str, **render_kwargs):
-        env = dm_control.manipulation.load(env_name)
-        return DmControlCompatibilityV0(env, **render_kwargs)
-
     for env_name in DM_CONTROL_MANIPULATION_ENVS:
         register(
             f"dm_control/{env_name}-v0",
-            partial(_make_dm_control_manipulation_env, env_name=env_name),
+            entry_point="shimmy.registration:_make_dm_control_manipulation_env",
+            kwargs=dict(env_name=env_name),
             nondeterministic=env_name.startswith("reassemble_5_bricks_random_order"),
         )
 
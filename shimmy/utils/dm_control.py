@@ -0,0 +1,289 @@
+"""Utility functions for DM Control."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import math
+import os
+import tempfile
+import threading
+from typing import Any, Iterator
+
+import dm_control.suite
+import mujoco
+import numpy as np
+from dm_control.mujoco import engine, wrapper
+from dm_control.rl import control
+
+
+def load_dm_control_suite(
+    domain_name: str,
+    task_name: str,
+    task_kwargs: dict[str, Any] | None = None,
+    environment_kwargs: dict[str, Any] | None = None,
+    visualize_reward: bool = False,
+) -> control.Environment:
+    """Helper function to load a DM Control Suite environment.
+
+    Args:
+        domain_name (str): name of the suite domain, e.g., "cartpole"
+        task_name (str): name of the domain task, e.g., "balance"
+        task_kwargs (Optional[dict[str, Any]]): keyword arguments for the task
+        environment_kwargs (Optional[dict[str, Any]]): keyword arguments for the control environment
+        visualize_reward (bool): if to visualize the reward in the rendering
+
+    Returns:
+        env (dm_control.rl.control.Environment): dm control suite environment
+    """
+    return dm_control.suite.load(
+        domain_name=domain_name,
+        task_name=task_name,
+        task_kwargs=task_kwargs,
+        environment_kwargs=environment_kwargs,
+        visualize_reward=visualize_reward,
+    )
+
+
+def _model_cache_key(xml_string: str | bytes, assets: dict[str, Any] | None) -> str:
+    """Returns a digest of the model XML, assets and MuJoCo version, as MJB binaries are specific to the MuJoCo version."""
+    digest = hashlib.sha256(mujoco.__version__.encode())
+    digest.update(xml_string.encode() if isinstance(xml_string, str) else xml_string)
+    for name, contents in sorted((assets or {}).items()):
+        digest.update(name.encode())
+        digest.update(contents.encode() if isinstance(contents, str) else contents)
+    return digest.hexdigest()
+
+
+# The unpatched model compilation, restored when the last `dm_control_model_cache` context exits
+_ORIGINAL_FROM_XML_STRING = wrapper.MjModel.__dict__["from_xml_string"]
+# The number of entered `dm_control_model_cache` contexts across threads, the patch is installed while positive
+_model_cache_contexts = 0
+_model_cache_lock = threading.Lock()
+# The cache directories of the contexts entered by the current thread, the innermost last
+_thread_cache_dirs = threading.local()
+
+
+def _cached_from_xml_string(cls, xml_string, assets=None):
+    """Compiles the model XML, loading and saving the MJB binary in the cache directory of the current thread's context."""
+    cache_dirs = getattr(_thread_cache_dirs, "cache_dirs", None)
+    if not cache_dirs:
+        return _ORIGINAL_FROM_XML_STRING.__func__(cls, xml_string, assets=assets)
+
+    cache_dir = cache_dirs[-1]
+    binary_path = os.path.join(cache_dir, f"{_model_cache_key(xml_string, assets)}.mjb")
+    if os.path.exists(binary_path):
+        try:
+            return cls.from_binary_path(binary_path)
+        except Exception:  # nosec
+            # a corrupted binary is recompiled and overwritten
+            pass
+
+    model = _ORIGINAL_FROM_XML_STRING.__func__(cls, xml_string, assets=assets)
+    # write to a temporary file then rename, such that other processes never load a partially written binary
+    file_descriptor, temp_path = tempfile.mkstemp(suffix=".mjb", dir=cache_dir)
+    os.close(file_descriptor)
+    try:
+        model.save_binary(temp_path)
+        os.replace(temp_path, binary_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return model
+
+
+@contextlib.contextmanager
+def dm_control_model_cache(cache_dir: str | os.PathLike) -> Iterator[None]:
+    """Within the context, compiled MuJoCo models are cached as MJB binaries in `cache_dir` and reused for identical models.
+
+    The cache is keyed by the model XML and its assets, such that copies of the same task are only compiled once across processes.
+
+    Note:
+        Files on disk which are referenced by the model XML but not included in the assets are not part of the cache key.
+        Only the models compiled by the thread that entered the context are cached.
+
+    Args:
+        cache_dir (str | os.PathLike): directory of the MJB binaries, created if it doesn't exist
+
+    Example:
+        >>> import dm_control.suite
+        >>> from shimmy.utils.dm_control import dm_control_model_cache
+        >>> with dm_control_model_cache("~/.cache/shimmy/dm_control"):
+        ...     env = dm_control.suite.load("dog", "run")
+    """
+    cache_dir = os.path.expanduser(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    global _model_cache_contexts
+    if not hasattr(_thread_cache_dirs, "cache_dirs"):
+        _thread_cache_dirs.cache_dirs = []
+    _thread_cache_dirs.cache_dirs.append(cache_dir)
+    with _model_cache_lock:
+        if _model_cache_contexts == 0:
+            wrapper.MjModel.from_xml_string = classmethod(_cached_from_xml_string)
+        _model_cache_contexts += 1
+    try:
+        yield
+    finally:
+        with _model_cache_lock:
+            _model_cache_contexts -= 1
+            if _model_cache_contexts == 0:
+                wrapper.MjModel.from_xml_string = _ORIGINAL_FROM_XML_STRING
+        # the contexts can exit out of order, such that the context's own directory is removed
+        cache_dirs = _thread_cache_dirs.cache_dirs
+        del cache_dirs[len(cache_dirs) - 1 - cache_dirs[::-1].index(cache_dir)]
+
+
+class MultiCameraRenderer:
+    """Renders the fixed cameras of a dm-control physics into a persistent mosaic or stacked frame.
+
+    For the mosaic, the cameras are laid out in a grid of `ceil(sqrt(num_cameras))` columns, otherwise with `stack`,
+    the cameras are stacked in a `(num_cameras, height, width, 3)` frame. Rather than a new
+    :class:`dm_control.mujoco.Camera` (with its scene and pixel buffers) per camera and render, the renderer
+    keeps a single scene and pixel buffer, reading each camera from the offscreen framebuffer straight into its tile.
+
+    Note:
+        The same frame is returned and overwritten on every render, copy the frame if it needs to be kept.
+    """
+
+    def __init__(
+        self,
+        physics: engine.Physics,
+        camera_ids: list[int | str] | None = None,
+        height: int = 240,
+        width: int = 320,
+        scene_option: wrapper.MjvOption | None = None,
+        stack: bool = False,
+        depth: bool = False,
+    ):
+        """Initialises the renderer for the physics.
+
+        Args:
+            physics (engine.Physics): The physics to render
+            camera_ids (Optional[list[int | str]]): The camera ids or names to render, by default all the fixed cameras
+            height (int): The height of each camera tile, 240 is the dm-control default
+            width (int): The width of each camera tile, 320 is the dm-control default
+            scene_option (Optional[wrapper.MjvOption]): The visualisation options of the scene
+            stack (bool): If to stack the cameras in a `(num_cameras, height, width, 3)` frame rather than a mosaic
+            depth (bool): If to render the depth (in meters) of the cameras, in a float32 frame with the same layout without the channels
+        """
+        if camera_ids is None:
+            camera_ids = list(range(physics.model.ncam))
+        if len(camera_ids) == 0:
+            raise ValueError("The model has no cameras to render.")
+        if (
+            height > physics.model.vis.global_.offheight
+            or width > physics.model.vis.global_.offwidth
+        ):
+            raise ValueError(
+                f"The camera height and width, {(height, width)}, are larger than the offscreen framebuffer, {(physics.model.vis.global_.offheight, physics.model.vis.global_.offwidth)}."
+            )
+
+        self.physics = physics
+        self.camera_ids = [
+            (
+                physics.model.name2id(camera_id, "camera")
+                if isinstance(camera_id, str)
+                else camera_id
+            )
+            for camera_id in camera_ids
+        ]
+        self.height, self.width = height, width
+        self.stack = stack
+        if self.stack:
+            self.num_columns, self.num_rows = 1, len(self.camera_ids)
+            frame_shape: tuple[int, ...] = (len(self.camera_ids), height, width)
+        else:
+            self.num_columns = int(math.ceil(math.sqrt(len(self.camera_ids))))
+            self.num_rows = int(math.ceil(len(self.camera_ids) / self.num_columns))
+            frame_shape = (self.num_rows * height, self.num_columns * width)
+
+        self.frame = np.zeros(frame_shape + (3,), dtype=np.uint8)
+        self._pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.depth: np.ndarray | None = None
+        self._depth_pixels: np.ndarray | None = None
+        if depth:
+            self.depth = np.zeros(frame_shape, dtype=np.float32)
+            self._depth_pixels = np.empty((height, width), dtype=np.float32)
+        self._rect = mujoco.MjrRect(0, 0, width, height)
+
+        self._scene = wrapper.MjvScene(model=physics.model)
+        self._scene_option = (
+            wrapper.MjvOption() if scene_option is None else scene_option
+        )
+        self._perturb = wrapper.MjvPerturb()
+        self._perturb.active = 0
+        self._perturb.select = 0
+
+        # The cameras with their tile of the frame and depth frame
+        self._cameras: list[tuple[wrapper.MjvCamera, np.ndarray, np.ndarray | None]] = (
+            []
+        )
+        for index, camera_id in enumerate(self.camera_ids):
+            if not 0 <= camera_id < physics.model.ncam:
+                raise ValueError(
+                    f"The model has {physics.model.ncam} fixed cameras, camera_id={camera_id} is invalid."
+                )
+            camera = wrapper.MjvCamera()
+            camera.type = mujoco.mjtCamera.mjCAMERA_FIXED
+            camera.fixedcamid = camera_id
+
+            if self.stack:
+                tile = self.frame[index]
+                depth_tile = None if self.depth is None else self.depth[index]
+            else:
+                row, col = divmod(index, self.num_columns)
+                tile_index = (
+                    slice(row * height, (row + 1) * height),
+                    slice(col * width, (col + 1) * width),
+                )
+                tile = self.frame[tile_index]
+                depth_tile = None if self.depth is None else self.depth[tile_index]
+            self._cameras.append((camera, tile, depth_tile))
+
+    def render(self) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+        """Renders the cameras into the frame.
+
+        Returns:
+            The frame, of shape `(num_rows * height, num_columns * width, 3)` for the mosaic or
+            `(num_cameras, height, width, 3)` if stacked, with the depth frame if `depth` is enabled.
+        """
+        contexts = self.physics.contexts
+        with contexts.gl.make_current() as ctx:
+            ctx.call(self._render_on_gl_thread, contexts.mujoco.ptr)
+
+        if self.depth is not None:
+            return self.frame, self.depth
+        return self.frame
+
+    def _render_on_gl_thread(self, context: mujoco.MjrContext):
+        """Renders the cameras and reads the pixels, the calls that require the OpenGL context."""
+        mujoco.mjr_setBuffer(mujoco.mjtFramebuffer.mjFB_OFFSCREEN, context)
+        model, data = self.physics.model.ptr, self.physics.data.ptr
+        # the distances to the near and far clipping planes to convert the depth buffer to meters
+        extent = self.physics.model.stat.extent
+        near = self.physics.model.vis.map.znear * extent
+        far = self.physics.model.vis.map.zfar * extent
+        for camera, tile, depth_tile in self._cameras:
+            mujoco.mjv_updateScene(
+                model,
+                data,
+                self._scene_option.ptr,
+                self._perturb.ptr,
+                camera.ptr,
+                mujoco.mjtCatBit.mjCAT_ALL,
+                self._scene.ptr,
+            )
+            mujoco.mjr_render(self._rect, self._scene.ptr, context)
+            mujoco.mjr_readPixels(self._pixels, self._depth_pixels, self._rect, context)
+            # the first row of the pixels is the bottom row of the image
+            np.copyto(tile, self._pixels[::-1])
+            if depth_tile is not None:
+                # near / (1 - depth * (1 - near / far)), see `dm_control.mujoco.Camera.render`
+                np.multiply(self._depth_pixels[::-1], near / far - 1, out=depth_tile)
+                depth_tile += 1
+                np.divide(near, depth_tile, out=depth_tile)
+
+    def close(self):
+        """Frees the scene."""
+        self._scene.free()
@@ -3,32 +3,105 @@
 from __future__ import annotations
 
 import copy
+import hashlib
+import threading
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Callable
 
 import dm_env
 import numpy as np
 from dm_env.specs import Array, BoundedArray, DiscreteArray
 from gymnasium import spaces
 
+# The maximum number of converted array specs kept by `dm_spec2gym_space`
+DM_SPACE_CACHE_SIZE = 1024
+_DM_SPACE_CACHE: OrderedDict[tuple[Any, ...], spaces.Space[Any]] = OrderedDict()
+# Guards the cache, as environments are constructed in several threads, e.g., by `DmControlEnvPoolV0`
+_DM_SPACE_CACHE_LOCK = threading.Lock()
 
-def dm_spec2gym_space(spec) -> spaces.Space[Any]:
-    """Converts a dm_env spec to a gymnasium space."""
+
+def _dm_spec_key(spec) -> tuple[Any, ...] | None:
+    """Returns a structural key of the array spec, its type, shape, dtype, name and a digest of its bounds."""
+    if type(spec) is Array:
+        return "Array", spec.shape, spec.dtype.str, spec.name, None
+    elif type(spec) in (BoundedArray, DiscreteArray):
+        bounds_digest = hashlib.blake2b(digest_size=16)
+        for bound in (spec.minimum, spec.maximum):
+            bound = np.ascontiguousarray(bound)
+            bounds_digest.update(repr((bound.shape, bound.dtype.str)).encode())
+            bounds_digest.update(bound.tobytes())
+        return (
+            type(spec).__name__,
+            spec.shape,
+            spec.dtype.str,
+            spec.name,
+            bounds_digest.digest(),
+        )
+    return None
+
+
+def _float_dtype(dtype: np.dtype, float_dtype: np.dtype | None) -> np.dtype:
+    """Returns the `float_dtype` for floating point dtypes if provided, otherwise the dtype."""
+    if float_dtype is not None and np.issubdtype(dtype, np.floating):
+        return float_dtype
+    return dtype
+
+
+def dm_spec2gym_space(spec, float_dtype: Any = None) -> spaces.Space[Any]:
+    """Converts a dm_env spec to a gymnasium space.
+
+    The converted array specs are kept in a bounded LRU cache keyed by the spec structure.
+    A shallow copy of the cached space is returned, the `low` and `high` arrays are shared and should not be modified in-place.
+
+    Args:
+        spec: The dm_env spec, either an array spec or a (nested) dict of specs
+        float_dtype: The dtype of the floating point spaces, e.g., `np.float32`, by default the dtype of the spec
+    """
+    if float_dtype is not None:
+        float_dtype = np.dtype(float_dtype)
     if isinstance(spec, (OrderedDict, dict)):
         return spaces.Dict(
-            {key: dm_spec2gym_space(value) for key, value in copy.copy(spec).items()}
+            {
+                key: dm_spec2gym_space(value, float_dtype)
+                for key, value in copy.copy(spec).items()
+            }
         )
+
+    key = _dm_spec_key(spec)
+    if key is None:
+        return _dm_array_spec2gym_space(spec, float_dtype)
+    key += (None if float_dtype is None else float_dtype.str,)
+
+    with _DM_SPACE_CACHE_LOCK:
+        space = _DM_SPACE_CACHE.get(key)
+        if space is not None:
+            _DM_SPACE_CACHE.move_to_end(key)
+    if space is None:
+        space = _dm_array_spec2gym_space(spec, float_dtype)
+        with _DM_SPACE_CACHE_LOCK:
+            _DM_SPACE_CACHE[key] = space
+            if len(_DM_SPACE_CACHE) > DM_SPACE_CACHE_SIZE:
+                _DM_SPACE_CACHE.popitem(last=False)
+    return copy.copy(space)
+
+
+def _dm_array_spec2gym_space(
+    spec, float_dtype: np.dtype | None = None
+) -> spaces.Space[Any]:
+    """Converts a dm_env array spec to a gymnasium space."""
     # not possible to use isinstance due to inheritance
-    elif type(spec) is BoundedArray:
-        low = np.broadcast_to(spec.minimum, spec.shape)
-        high = np.broadcast_to(spec.maximum, spec.shape)
+    if type(spec) is BoundedArray:
+        dtype = _float_dtype(spec.dtype, float_dtype)
+        low = np.broadcast_to(spec.minimum, spec.shape).astype(dtype)
+        high = np.broadcast_to(spec.maximum, spec.shape).astype(dtype)
         return spaces.Box(
             low=low,
             high=high,
             shape=spec.shape,
-            dtype=spec.dtype,  # pyright: ignore[reportGeneralTypeIssues]
+            dtype=dtype,  # pyright: ignore[reportGeneralTypeIssues]
         )
     elif type(spec) is Array:
+        dtype = _float_dtype(spec.dtype, float_dtype)
         if np.issubdtype(spec.dtype, np.integer):
             low = np.iinfo(spec.dtype).min
             high = np.iinfo(spec.dtype).max
@@ -45,7 +118,7 @@ def dm_spec2gym_space(spec) -> spaces.Space[Any]:
             low=low,
             high=high,
             shape=spec.shape,
-            dtype=spec.dtype,  # pyright: ignore[reportGeneralTypeIssues]
+            dtype=dtype,  # pyright: ignore[reportGeneralTypeIssues]
         )
     elif type(spec) is DiscreteArray:
         return spaces.Discrete(spec.num_values)
@@ -72,16 +145,186 @@ def dm_obs2gym_obs(obs) -> np.ndarray | dict[str, Any]:
         return np.asarray(obs)
 
 
-def dm_env_step2gym_step(timestep) -> tuple[Any, float, bool, bool, dict[str, Any]]:
+class DmObsConverter:
+    """Converts dm_env observations to gymnasium observations using a plan compiled once from the observation spec.
+
+    Unlike :func:`dm_obs2gym_obs`, the observation structure is walked only once, when the converter is built.
+    Each leaf of the spec is recorded as a flat entry of its key path, dtype and shape, such that converting
+    an observation is a single loop over the entries without recursion or copies of the observation dict.
+    """
+
+    def __init__(self, spec, float_dtype: Any = None):
+        """Compiles the conversion plan for the dm_env observation spec.
+
+        Args:
+            spec: The dm_env observation spec, either an array spec or a (nested) dict of specs
+            float_dtype: The dtype the floating point observations are cast to, e.g., `np.float32`, by default the dtype of the spec
+        """
+        self.is_dict = isinstance(spec, (OrderedDict, dict))
+        self.float_dtype = None if float_dtype is None else np.dtype(float_dtype)
+
+        # The (nested) dict paths that must be created, parents before their children
+        self.containers: list[tuple[str, ...]] = []
+        # The leaf entries as (parent path, key, dtype, shape)
+        self.entries: list[tuple[tuple[str, ...], str, np.dtype, tuple[int, ...]]] = []
+
+        if self.is_dict:
+            self._compile(spec, ())
+        else:
+            self.dtype = _float_dtype(np.dtype(spec.dtype), self.float_dtype)
+            self.shape = tuple(spec.shape)
+
+    def _compile(self, spec: dict[str, Any], path: tuple[str, ...]):
+        """Records the leaf entries and sub-dictionaries of a dict spec."""
+        for key, value in spec.items():
+            if isinstance(value, (OrderedDict, dict)):
+                self.containers.append(path + (key,))
+                self._compile(value, path + (key,))
+            else:
+                self.entries.append(
+                    (
+                        path,
+                        key,
+                        _float_dtype(np.dtype(value.dtype), self.float_dtype),
+                        tuple(value.shape),
+                    )
+                )
+
+    def __call__(self, obs) -> np.ndarray | dict[str, Any]:
+        """Converts a dm_env observation following the compiled plan.
+
+        Args:
+            obs: The dm_env observation
+
+        Returns:
+            The Gymnasium-compatible observation.
+        """
+        if not self.is_dict:
+            return np.asarray(obs, dtype=self.dtype)
+
+        if not self.containers:
+            return {
+                key: np.asarray(obs[key], dtype=dtype)
+                for _, key, dtype, _ in self.entries
+            }
+
+        gym_containers: dict[tuple[str, ...], dict[str, Any]] = {(): {}}
+        dm_containers: dict[tuple[str, ...], Any] = {(): obs}
+        for path in self.containers:
+            gym_containers[path] = gym_containers[path[:-1]][path[-1]] = {}
+            dm_containers[path] = dm_containers[path[:-1]][path[-1]]
+
+        for path, key, dtype, _ in self.entries:
+            gym_containers[path][key] = np.asarray(
+                dm_containers[path][key], dtype=dtype
+            )
+        return gym_containers[()]
+
+
+class DmFlatObsConverter:
+    """Converts dm_env observations into a single preallocated, flat observation buffer.
+
+    The offset of each observation leaf in the buffer is computed once from the observation spec.
+    Leaves are laid out in sorted key order, the same as `gymnasium.spaces.flatten` for the equivalent
+    :class:`gymnasium.spaces.Dict` space, such that the buffer is a drop-in replacement for the
+    `FlattenObservation` wrapper.
+
+    Note:
+        The same buffer is returned and overwritten on every conversion, copy the observation if it needs to be kept.
+    """
+
+    def __init__(
+        self,
+        spec,
+        dtype: np.dtype | type = np.float32,
+        buffer: np.ndarray | None = None,
+    ):
+        """Computes the flat buffer layout for the dm_env observation spec.
+
+        Args:
+            spec: The dm_env observation spec, either an array spec or a (nested) dict of specs
+            dtype: The dtype of the flat buffer
+            buffer: An existing flat buffer to write observations into, e.g., a row of a batched buffer, otherwise a new buffer is allocated
+        """
+        leaves: list[tuple[tuple[str, ...], Any]] = []
+        self._collect_leaves(spec, (), leaves)
+        leaves.sort(key=lambda leaf: leaf[0])
+
+        lows, highs, sizes = [], [], []
+        for path, leaf_spec in leaves:
+            space = dm_spec2gym_space(leaf_spec)
+            if not isinstance(space, spaces.Box):
+                raise TypeError(
+                    f"Cannot flatten the observation spec {leaf_spec} for {path}, only array specs are supported."
+                )
+            lows.append(space.low.ravel())
+            highs.append(space.high.ravel())
+            sizes.append(int(np.prod(space.shape, dtype=int)))
+
+        if buffer is None:
+            buffer = np.zeros(sum(sizes), dtype=dtype)
+        elif buffer.shape != (sum(sizes),) or buffer.dtype != dtype:
+            raise ValueError(
+                f"Expected the flat buffer to have shape {(sum(sizes),)} and dtype {np.dtype(dtype)}, actual shape {buffer.shape} and dtype {buffer.dtype}."
+            )
+        self.buffer = buffer
+        self.space = spaces.Box(
+            low=np.concatenate(lows).astype(dtype),
+            high=np.concatenate(highs).astype(dtype),
+            dtype=dtype,  # pyright: ignore[reportGeneralTypeIssues]
+        )
+
+        # The leaf entries as (key path, view of the buffer in the leaf shape)
+        self.entries: list[tuple[tuple[str, ...], np.ndarray]] = []
+        offset = 0
+        for (path, leaf_spec), size in zip(leaves, sizes):
+            view = self.buffer[offset : offset + size].reshape(leaf_spec.shape)
+            self.entries.append((path, view))
+            offset += size
+
+    def _collect_leaves(
+        self, spec, path: tuple[str, ...], leaves: list[tuple[tuple[str, ...], Any]]
+    ):
+        """Collects the key path and array spec of every leaf of the spec."""
+        if isinstance(spec, (OrderedDict, dict)):
+            for key, value in spec.items():
+                self._collect_leaves(value, path + (key,), leaves)
+        else:
+            leaves.append((path, spec))
+
+    def __call__(self, obs) -> np.ndarray:
+        """Writes a dm_env observation into the flat buffer.
+
+        Args:
+            obs: The dm_env observation
+
+        Returns:
+            The flat buffer containing the observation.
+        """
+        for path, view in self.entries:
+            value = obs
+            for key in path:
+                value = value[key]
+            np.copyto(view, value, casting="unsafe")
+        return self.buffer
+
+
+def dm_env_step2gym_step(
+    timestep,
+    obs_converter: Callable[[Any], Any] = dm_obs2gym_obs,
+    timestep_info: bool = True,
+) -> tuple[Any, float, bool, bool, dict[str, Any]]:
     """Converts a dm_env timestep to the required return info from Gymnasium step() function.
 
     Args:
         timestep: The dm_env timestep
+        obs_converter: The function used to convert the observation, e.g., a :class:`DmObsConverter` for the env observation spec
+        timestep_info: If to include the timestep discount and step type in the info, otherwise the info is empty
 
     Returns:
         observation, reward, terminated, truncated, info.
     """
-    obs = dm_obs2gym_obs(timestep.observation)
+    obs = obs_converter(timestep.observation)
     reward = timestep.reward or 0
 
     # set terminated and truncated
@@ -93,10 +336,13 @@ def dm_env_step2gym_step(timestep) -> tuple[Any, float, bool, bool, dict[str, An
         else:
             terminated = True
 
-    info = {
-        "timestep.discount": timestep.discount,
-        "timestep.step_type": timestep.step_type,
-    }
+    if timestep_info:
+        info = {
+            "timestep.discount": timestep.discount,
+            "timestep.step_type": timestep.step_type,
+        }
+    else:
+        info = {}
 
     return (
         obs,
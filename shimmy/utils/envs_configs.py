@@ -55,6 +55,22 @@ DM_CONTROL_SUITE_ENVS = (
 )
 
 
+# Listed in https://github.com/deepmind/dm_control/blob/main/dm_control/locomotion/examples/examples_test.py
+# as (module in `dm_control.locomotion.examples`, environment function, nondeterministic)
+DM_CONTROL_LOCOMOTION_ENVS = (
+    ("basic_cmu_2019", "cmu_humanoid_run_walls", False),
+    ("basic_cmu_2019", "cmu_humanoid_run_gaps", False),
+    ("basic_cmu_2019", "cmu_humanoid_go_to_target", False),
+    ("basic_cmu_2019", "cmu_humanoid_maze_forage", True),
+    ("basic_cmu_2019", "cmu_humanoid_heterogeneous_forage", True),
+    ("basic_rodent_2020", "rodent_escape_bowl", False),
+    ("basic_rodent_2020", "rodent_run_gaps", False),
+    ("basic_rodent_2020", "rodent_maze_forage", True),
+    ("basic_rodent_2020", "rodent_two_touch", True),
+    # ("cmu_2020_tracking", "cmu_humanoid_tracking", False),
+)
+
+
 DM_CONTROL_MANIPULATION_ENVS = (
     "stack_2_bricks_features",
     "stack_2_bricks_vision",
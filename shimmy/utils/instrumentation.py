@@ -0,0 +1,152 @@
+"""Per-step latency instrumentation for the compatibility wrappers."""
+
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+import numpy as np
+
+
+class StepTimer:
+    """Records the time of each step spent in the underlying environment, in shimmy's conversion and in rendering.
+
+    The compatibility wrappers record their steps if a timer is assigned to their `step_timer` attribute,
+    timing a step with :meth:`start`, a :meth:`lap` at the end of each phase and :meth:`stop`.
+    The times of the last `window` steps are kept in a ring buffer, such that recording a step is constant time,
+    with the histograms and summary statistics computed on demand.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from shimmy.utils.instrumentation import StepTimer
+        >>> env = gym.make("dm_control/cartpole-balance-v0")
+        >>> env.unwrapped.step_timer = StepTimer()
+        >>> _ = env.reset(seed=42)
+        >>> _ = env.step(env.action_space.sample())
+        >>> env.unwrapped.step_timer.summary()["env"]["mean"]  # doctest: +SKIP
+        4.2e-05
+    """
+
+    phases = ("env", "conversion", "render")
+
+    def __init__(
+        self,
+        window: int = 1000,
+        callback: Callable[[dict[str, float]], None] | None = None,
+    ):
+        """Initialises the timer.
+
+        Args:
+            window (int): The number of most recent steps to keep the times of
+            callback (Optional[Callable[[dict[str, float]], None]]): Called after every step with the time of each phase in seconds
+        """
+        assert window > 0, f"Expected a positive window, actual: {window}"
+        self.window = window
+        self.callback = callback
+        self.times = np.zeros((len(self.phases), window), dtype=np.float64)
+        self.num_steps = 0
+
+        # The times of the phases of the current step and the time that the last lap ended
+        self._step_times = [0.0 for _ in self.phases]
+        self._lap_start = 0.0
+
+    def start(self):
+        """Starts timing a step."""
+        step_times = self._step_times
+        step_times[0] = step_times[1] = step_times[2] = 0.0
+        self._lap_start = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Adds the time since the start or the last lap to the phase of the current step.
+
+        A phase can be lapped several times within a step, if the step interleaves the conversion and the environment.
+
+        Args:
+            phase (str): The phase, one of "env", "conversion" or "render"
+        """
+        now = time.perf_counter()
+        self._step_times[self.phases.index(phase)] += now - self._lap_start
+        self._lap_start = now
+
+    def stop(self):
+        """Records the lapped times of the current step, the phases without laps are recorded as zero."""
+        self.record(*self._step_times)
+
+    def record(self, env_time: float, conversion_time: float, render_time: float = 0.0):
+        """Records the time of a step.
+
+        Args:
+            env_time (float): The time in the underlying environment, in seconds
+            conversion_time (float): The time converting the observations, rewards and masks, in seconds
+            render_time (float): The time rendering, in seconds
+        """
+        index = self.num_steps % self.window
+        self.times[0, index] = env_time
+        self.times[1, index] = conversion_time
+        self.times[2, index] = render_time
+        self.num_steps += 1
+
+        if self.callback is not None:
+            self.callback(
+                {"env": env_time, "conversion": conversion_time, "render": render_time}
+            )
+
+    def _recorded_times(self, phase: str) -> np.ndarray:
+        """Returns the recorded times of the phase within the window."""
+        if phase not in self.phases:
+            raise ValueError(f"Unknown phase, {phase}, expected one of {self.phases}.")
+        return self.times[self.phases.index(phase), : min(self.num_steps, self.window)]
+
+    def histogram(
+        self, phase: str, bins: int | np.ndarray = 20
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the histogram of the phase's times within the window, see :func:`numpy.histogram`.
+
+        Args:
+            phase (str): The phase, one of "env", "conversion" or "render"
+            bins (int | np.ndarray): The number of bins or the bin edges
+
+        Returns:
+            The counts and the bin edges in seconds
+        """
+        return np.histogram(self._recorded_times(phase), bins=bins)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Returns the mean, median, 90th and 99th percentile and maximum time of each phase within the window, in seconds."""
+        summary = {}
+        for phase in self.phases:
+            times = self._recorded_times(phase)
+            if len(times) == 0:
+                summary[phase] = dict.fromkeys(
+                    ("mean", "p50", "p90", "p99", "max"), 0.0
+                )
+                continue
+            p50, p90, p99 = np.percentile(times, (50, 90, 99))
+            summary[phase] = {
+                "mean": float(np.mean(times)),
+                "p50": float(p50),
+                "p90": float(p90),
+                "p99": float(p99),
+                "max": float(np.max(times)),
+            }
+        return summary
+
+    def reset(self):
+        """Clears the recorded times."""
+        self.num_steps = 0
+
+
+class _DisabledStepTimer:
+    """The timer of wrappers without an assigned :class:`StepTimer`, such that the steps time nothing without branching."""
+
+    def start(self):
+        """Does nothing."""
+
+    def lap(self, phase: str):
+        """Does nothing."""
+
+    def stop(self):
+        """Does nothing."""
+
+
+DISABLED_STEP_TIMER = _DisabledStepTimer()
@@ -0,0 +1,71 @@
+"""Utility functions for shimmy's vector environments."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from gymnasium.vector import AutoresetMode, VectorEnv
+
+
+def check_autoreset_mode(autoreset_mode: str | AutoresetMode) -> AutoresetMode:
+    """Returns the autoreset mode, raising an error if it isn't next-step or disabled, the modes supported by shimmy's vector environments.
+
+    Args:
+        autoreset_mode (str | AutoresetMode): The autoreset mode
+
+    Returns:
+        The autoreset mode
+
+    Raises:
+        ValueError: If the autoreset mode is same-step
+    """
+    autoreset_mode = AutoresetMode(autoreset_mode)
+    if autoreset_mode not in (AutoresetMode.NEXT_STEP, AutoresetMode.DISABLED):
+        raise ValueError(
+            f"Unsupported autoreset mode, {autoreset_mode}, only next-step and disabled are supported."
+        )
+    return autoreset_mode
+
+
+def vector_reset_args(
+    env: VectorEnv,
+    seed: int | list[int | None] | None,
+    options: dict[str, Any] | None,
+) -> tuple[list[int | None], np.ndarray]:
+    """Returns the seed of each sub-environment and the mask of the sub-environments to reset.
+
+    With an int seed, the vector environment's `np_random` is seeded and the sub-environments are seeded with
+    `[seed, seed+1, ..., seed+n]`. If `options["reset_mask"]` is provided, only the selected sub-environments are reset.
+
+    Args:
+        env (VectorEnv): The vector environment being reset
+        seed (int | list[int | None] | None): The seeds passed to `reset`
+        options (Optional[dict[str, Any]]): The options passed to `reset`
+
+    Returns:
+        The seeds and the boolean reset mask of the sub-environments
+
+    Raises:
+        ValueError: If the number of seeds or the shape of the reset mask doesn't match `num_envs`
+    """
+    if seed is None:
+        seed = [None for _ in range(env.num_envs)]
+    elif isinstance(seed, int):
+        VectorEnv.reset(env, seed=seed)
+        seed = [seed + i for i in range(env.num_envs)]
+    if len(seed) != env.num_envs:
+        raise ValueError(
+            f"If seeds are passed as a list the length must match num_envs={env.num_envs} but got length={len(seed)}."
+        )
+
+    if options is not None and "reset_mask" in options:
+        reset_mask = np.asarray(options["reset_mask"], dtype=np.bool_)
+        if reset_mask.shape != (env.num_envs,):
+            raise ValueError(
+                f"`options['reset_mask']` must have shape `({env.num_envs},)`, got {reset_mask.shape}"
+            )
+    else:
+        reset_mask = np.ones((env.num_envs,), dtype=np.bool_)
+
+    return seed, reset_mask
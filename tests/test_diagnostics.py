@@ -0,0 +1,23 @@
+"""Tests the shimmy diagnostics."""
+
+import json
+
+from shimmy.diagnostics import OPTIONAL_BACKENDS, import_cost, main
+
+
+def test_import_cost(capsys):
+    """Tests the import cost report of the optional backends."""
+    report = import_cost()
+
+    assert report["shimmy"]["seconds"] > 0
+    assert set(report["backends"]) == {name for name, _, _ in OPTIONAL_BACKENDS}
+    for name, entry_points, _ in OPTIONAL_BACKENDS:
+        assert report["backends"][name]["entry_points"] == list(entry_points)
+    for cost in report["backends"].values():
+        assert cost["seconds"] >= 0
+        assert isinstance(cost["eager"], bool)
+        # backends that are not installed can't be imported eagerly
+        assert cost["error"] is None or not cost["eager"]
+
+    main(["import-cost", "--json"])
+    assert json.loads(capsys.readouterr().out).keys() == report.keys()
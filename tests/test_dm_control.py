@@ -1,10 +1,15 @@
 """Tests the functionality of the DmControlCompatibility Wrapper on dm_control envs."""
 
+import multiprocessing
 import pickle
+import subprocess
+import sys
+import threading
 import warnings
 from typing import Callable
 
 import dm_control.suite
+import dm_env
 import gymnasium as gym
 import numpy as np
 import pytest
@@ -15,13 +20,26 @@ from dm_control.suite.wrappers import (
     mujoco_profiling,
     pixels,
 )
+from dm_env.specs import Array, BoundedArray
 from gymnasium.envs.registration import registry
 from gymnasium.error import Error
 from gymnasium.utils.env_checker import check_env, data_equivalence
 
 import shimmy
 from shimmy.dm_control_compatibility import DmControlCompatibilityV0
+from shimmy.dm_control_vector_env import (
+    DmControlAsyncVectorEnvV0,
+    DmControlSuiteVectorEnvV0,
+)
 from shimmy.registration import DM_CONTROL_SUITE_ENVS
+from shimmy.utils.dm_control import MultiCameraRenderer, dm_control_model_cache
+from shimmy.utils.dm_env import (
+    DmFlatObsConverter,
+    DmObsConverter,
+    dm_obs2gym_obs,
+    dm_spec2gym_space,
+)
+from shimmy.utils.instrumentation import StepTimer
 
 gym.register_envs(shimmy)
 
@@ -36,6 +54,19 @@ DM_CONTROL_ENV_IDS = [
 def test_dm_control_suite_envs():
     """Tests that all DM_CONTROL_ENVS are equal to the known dm-control.suite tasks."""
     assert dm_control.suite.ALL_TASKS == DM_CONTROL_SUITE_ENVS
+    assert len(DM_CONTROL_ENV_IDS) == 85
+
+
+def test_lazy_registration():
+    """Tests that `import shimmy` registers the dm-control environments without importing dm-control."""
+    code = (
+        "import sys, gymnasium, shimmy\n"
+        "assert 'dm_control/cartpole-balance-v0' in gymnasium.registry\n"
+        "assert not any(name.startswith(('dm_control', 'mujoco')) for name in sys.modules), [name for name in sys.modules if name.startswith(('dm_control', 'mujoco'))]\n"
+        "env = gymnasium.make('dm_control/cartpole-balance-v0')\n"
+        "assert 'dm_control.suite' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
 
 
 CHECK_ENV_IGNORE_WARNINGS = [
@@ -166,6 +197,69 @@ def test_rendering_multiple_cameras(height, width):
     env.close()
 
 
+def test_multi_camera_renderer():
+    """Tests that the multi-camera renderer mosaic is equal to rendering each camera separately."""
+    env = dm_control.suite.load("quadruped", "run")
+    env.reset()
+    physics = env.physics
+    renderer = MultiCameraRenderer(physics, height=48, width=64)
+    frame = renderer.render()
+    assert frame.shape == (2 * 48, 2 * 64, 3)
+    for index in range(physics.model.ncam):
+        row, col = divmod(index, 2)
+        assert np.array_equal(
+            frame[row * 48 : (row + 1) * 48, col * 64 : (col + 1) * 64],
+            physics.render(camera_id=index, height=48, width=64),
+        )
+
+    # the frame is reused between renders
+    env.step(np.zeros(env.action_spec().shape))
+    assert renderer.render() is frame
+
+    # a subset of the cameras by name, the empty tile is black
+    camera_names = [physics.model.id2name(i, "camera") for i in range(3)]
+    subset_frame = MultiCameraRenderer(
+        physics, camera_ids=camera_names, height=48, width=64
+    ).render()
+    assert np.array_equal(subset_frame[:48], frame[:48])
+    assert np.array_equal(subset_frame[48:, :64], frame[48:, :64])
+    assert np.all(subset_frame[48:, 64:] == 0)
+
+    with pytest.raises(ValueError):
+        MultiCameraRenderer(physics, camera_ids=[physics.model.ncam])
+    renderer.close()
+
+
+@pytest.mark.parametrize("depth", [False, True])
+def test_rendering_multi_camera_stack(depth):
+    """Tests that multi_camera_stack rendering returns the stacked camera subset and depth."""
+    env = gym.make(
+        "dm_control/quadruped-run-v0",
+        render_mode="multi_camera_stack",
+        render_kwargs=dict(height=48, width=64, camera_ids=[2, 0], depth=depth),
+    )
+    env.reset(seed=1)
+    env.step(env.action_space.sample())
+
+    frames = env.render()
+    physics = env.unwrapped.physics
+    if depth:
+        frames, depth_frames = frames
+        assert depth_frames.shape == (2, 48, 64) and depth_frames.dtype == np.float32
+        for index, camera_id in enumerate([2, 0]):
+            assert np.allclose(
+                depth_frames[index],
+                physics.render(camera_id=camera_id, height=48, width=64, depth=True),
+            )
+
+    assert frames.shape == (2, 48, 64, 3) and frames.dtype == np.uint8
+    for index, camera_id in enumerate([2, 0]):
+        assert np.array_equal(
+            frames[index], physics.render(camera_id=camera_id, height=48, width=64)
+        )
+    env.close()
+
+
 @pytest.mark.parametrize("height,width", [(84, 84), (48, 48), (128, 128), (100, 200)])
 def test_rendering_depth(height, width):
     """Test that depth rendering mode works for dm-control environments."""
@@ -244,3 +338,576 @@ def test_dm_control_wrappers(
     )
     check_env(env.unwrapped, skip_render_check=True)
     env.close()
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    [
+        "dm_control/humanoid_CMU-stand-v0",
+        "dm_control/stack_2_bricks_features-v0",
+        "dm_control/CmuHumanoidRunWalls-v0",
+    ],
+)
+def test_obs_converter(env_id):
+    """Tests that the compiled observation converter matches the recursive observation conversion."""
+    env = gym.make(env_id, disable_env_checker=True)
+    dm_env = env.unwrapped._env
+    converter = DmObsConverter(dm_env.observation_spec())
+
+    timestep = dm_env.reset()
+    for _ in range(5):
+        obs = converter(timestep.observation)
+        assert data_equivalence(obs, dm_obs2gym_obs(timestep.observation))
+        assert obs in env.observation_space
+        timestep = dm_env.step(env.action_space.sample())
+
+    env.close()
+
+
+def test_obs_converter_nested_spec():
+    """Tests the compiled observation converter with nested and non-dict specs."""
+    spec = {
+        "a": Array((2,), np.float64),
+        "b": {"c": Array((), np.int32), "d": {"e": Array((3, 1), np.float32)}},
+    }
+    obs = {
+        "a": [1.0, 2.0],
+        "b": {"c": 3, "d": {"e": np.ones((3, 1), dtype=np.float32)}},
+    }
+    gym_obs = DmObsConverter(spec)(obs)
+    assert data_equivalence(
+        gym_obs,
+        {
+            "a": np.array([1.0, 2.0]),
+            "b": {
+                "c": np.array(3, dtype=np.int32),
+                "d": {"e": np.ones((3, 1), dtype=np.float32)},
+            },
+        },
+    )
+
+    assert data_equivalence(
+        DmObsConverter(Array((2,), np.float32))([1, 2]),
+        np.array([1, 2], dtype=np.float32),
+    )
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    [
+        "dm_control/cartpole-balance-v0",
+        "dm_control/humanoid_CMU-stand-v0",
+        "dm_control/stack_2_bricks_features-v0",
+    ],
+)
+def test_flatten_observation(env_id):
+    """Tests that the flat observation mode is equivalent to the `FlattenObservation` wrapper."""
+    flat_env = gym.make(env_id, flatten_observation=True, disable_env_checker=True)
+    dict_env = gym.wrappers.FlattenObservation(gym.make(env_id))
+
+    assert flat_env.observation_space.dtype == np.float32
+    assert flat_env.observation_space.shape == dict_env.observation_space.shape
+    assert np.all(
+        flat_env.observation_space.low
+        == dict_env.observation_space.low.astype(np.float32)
+    )
+
+    flat_obs, _ = flat_env.reset(seed=42)
+    dict_obs, _ = dict_env.reset(seed=42)
+    assert flat_obs in flat_env.observation_space
+    np.testing.assert_allclose(flat_obs, dict_obs.astype(np.float32))
+
+    for _ in range(10):
+        action = dict_env.action_space.sample()
+        flat_obs, flat_reward, *_ = flat_env.step(action)
+        dict_obs, dict_reward, *_ = dict_env.step(action)
+        np.testing.assert_allclose(flat_obs, dict_obs.astype(np.float32))
+        assert flat_reward == dict_reward
+
+    flat_env.close()
+    dict_env.close()
+
+
+def test_flat_obs_converter_buffer():
+    """Tests that the flat observation converter reuses a single buffer."""
+    spec = {"b": Array((2, 2), np.float64), "a": Array((), np.int32)}
+    converter = DmFlatObsConverter(spec)
+
+    obs = converter({"b": np.arange(4.0).reshape(2, 2), "a": 7})
+    assert obs is converter.buffer
+    assert data_equivalence(obs, np.array([7, 0, 1, 2, 3], dtype=np.float32))
+
+    converter({"b": np.zeros((2, 2)), "a": 1})
+    assert data_equivalence(obs, np.array([1, 0, 0, 0, 0], dtype=np.float32))
+
+
+@pytest.mark.parametrize("flatten_observation", [False, True])
+@pytest.mark.parametrize(
+    "domain_name,task_name", [("cartpole", "balance"), ("humanoid_CMU", "stand")]
+)
+def test_suite_vector_env(domain_name, task_name, flatten_observation):
+    """Tests that the native suite vector env is equivalent to a `SyncVectorEnv` of compatibility environments."""
+    env_id = f"dm_control/{domain_name}-{task_name}-v0"
+    num_envs = 3
+    task_kwargs = {"time_limit": 0.1}
+
+    native_envs = DmControlSuiteVectorEnvV0(
+        domain_name,
+        task_name,
+        num_envs=num_envs,
+        task_kwargs=task_kwargs,
+        flatten_observation=flatten_observation,
+    )
+    sync_envs = gym.vector.SyncVectorEnv(
+        [
+            lambda: gym.make(
+                env_id,
+                task_kwargs=task_kwargs,
+                flatten_observation=flatten_observation,
+                disable_env_checker=True,
+            )
+            for _ in range(num_envs)
+        ]
+    )
+    assert native_envs.observation_space == sync_envs.observation_space
+    assert native_envs.action_space == sync_envs.action_space
+
+    native_obs, native_info = native_envs.reset(seed=42)
+    sync_obs, sync_info = sync_envs.reset(seed=42)
+    assert data_equivalence(native_obs, sync_obs)
+    assert native_obs in native_envs.observation_space
+
+    # the short time limit truncates the episodes, testing the autoreset
+    native_envs.action_space.seed(42)
+    for _ in range(25):
+        actions = native_envs.action_space.sample()
+        native_step = native_envs.step(actions)
+        sync_step = sync_envs.step(actions)
+        for native_data, sync_data in zip(native_step[:4], sync_step[:4]):
+            assert data_equivalence(native_data, sync_data)
+
+        # the discount is `None` for the reset timesteps
+        sync_discounts = [d or 0.0 for d in sync_step[4]["timestep.discount"]]
+        assert np.all(native_step[4]["timestep.discount"] == sync_discounts)
+
+    native_envs.close()
+    sync_envs.close()
+
+
+@pytest.mark.parametrize("flatten_observation", [False, True])
+def test_async_vector_env(flatten_observation):
+    """Tests that the shared memory vector env is equivalent to a `SyncVectorEnv` of compatibility environments."""
+    env_fns = [
+        lambda: gym.make(
+            "dm_control/cartpole-balance-v0",
+            task_kwargs={"time_limit": 0.1},
+            flatten_observation=flatten_observation,
+            disable_env_checker=True,
+        )
+        for _ in range(3)
+    ]
+    async_envs = DmControlAsyncVectorEnvV0(env_fns)
+    sync_envs = gym.vector.SyncVectorEnv(env_fns)
+    assert async_envs.observation_space == sync_envs.observation_space
+    assert async_envs.action_space == sync_envs.action_space
+
+    async_obs, _ = async_envs.reset(seed=42)
+    sync_obs, _ = sync_envs.reset(seed=42)
+    assert data_equivalence(async_obs, sync_obs)
+
+    # the short time limit truncates the episodes, testing the autoreset
+    async_envs.action_space.seed(42)
+    for _ in range(25):
+        actions = async_envs.action_space.sample()
+        async_step = async_envs.step(actions)
+        sync_step = sync_envs.step(actions)
+        for async_data, sync_data in zip(async_step[:4], sync_step[:4]):
+            assert data_equivalence(async_data, sync_data)
+
+    # partial reset of the sub-environments
+    async_obs, _ = async_envs.reset(
+        seed=[1, None, None], options={"reset_mask": np.array([True, False, False])}
+    )
+    sync_obs, _ = sync_envs.reset(
+        seed=[1, None, None], options={"reset_mask": np.array([True, False, False])}
+    )
+    assert data_equivalence(async_obs, sync_obs)
+
+    async_envs.close()
+    sync_envs.close()
+
+
+def test_async_vector_env_worker_error():
+    """Tests that errors in the workers are raised in the main process."""
+    envs = DmControlAsyncVectorEnvV0(
+        [
+            lambda: gym.make("dm_control/cartpole-balance-v0", disable_env_checker=True)
+            for _ in range(2)
+        ]
+    )
+    envs.reset(seed=42)
+    with pytest.raises(RuntimeError, match="Worker 0"):
+        envs.step(np.full((2, 1), np.nan))
+    envs.close()
+
+
+def test_async_vector_env_startup_error():
+    """Tests that the started workers are closed if a sub-environment fails to be created."""
+
+    def failing_env_fn():
+        raise ValueError("Failed to create the environment")
+
+    with pytest.raises(RuntimeError, match="Worker 1"):
+        DmControlAsyncVectorEnvV0(
+            [
+                lambda: gym.make("dm_control/cartpole-balance-v0").unwrapped,
+                failing_env_fn,
+            ]
+        )
+    assert not any(
+        process.name.startswith("Worker<DmControlAsyncVectorEnvV0>")
+        for process in multiprocessing.active_children()
+    )
+
+
+def test_spec2space_cache():
+    """Tests that converted specs are cached while the returned spaces remain independent."""
+    spec = BoundedArray((3,), np.float64, minimum=-1.0, maximum=[1.0, 2.0, 3.0])
+    space_1 = dm_spec2gym_space(spec)
+    space_2 = dm_spec2gym_space(
+        BoundedArray((3,), np.float64, minimum=-1.0, maximum=[1.0, 2.0, 3.0])
+    )
+    assert space_1 == space_2 and space_1 is not space_2
+    assert space_1.low is space_2.low
+
+    # the random number generators are independent
+    space_1.seed(1)
+    space_2.seed(1)
+    assert data_equivalence(space_1.sample(), space_2.sample())
+
+    # specs with different bounds are not equal
+    space_3 = dm_spec2gym_space(
+        BoundedArray((3,), np.float64, minimum=-1.0, maximum=[1.0, 2.0, 4.0])
+    )
+    assert space_3 != space_1
+
+
+def test_spec2space_cache_threads(monkeypatch):
+    """Tests that the spec conversion cache can be evicted while it is used from several threads."""
+    monkeypatch.setattr(shimmy.utils.dm_env, "DM_SPACE_CACHE_SIZE", 4)
+    errors = []
+
+    def convert_specs():
+        try:
+            for i in range(200):
+                spec = BoundedArray(
+                    (i % 16 + 1,), np.float64, minimum=-1.0, maximum=1.0
+                )
+                assert dm_spec2gym_space(spec).shape == (i % 16 + 1,)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=convert_specs) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_model_cache(tmp_path):
+    """Tests that compiled models are saved to the model cache and reused with identical results."""
+    env_1 = gym.make("dm_control/cartpole-balance-v0", model_cache_dir=str(tmp_path))
+    cached_models = list(tmp_path.glob("*.mjb"))
+    assert len(cached_models) == 1
+
+    env_2 = gym.make("dm_control/cartpole-balance-v0", model_cache_dir=str(tmp_path))
+    assert list(tmp_path.glob("*.mjb")) == cached_models
+
+    obs_1, _ = env_1.reset(seed=1)
+    obs_2, _ = env_2.reset(seed=1)
+    assert data_equivalence(obs_1, obs_2)
+
+    action = env_1.action_space.sample()
+    assert data_equivalence(env_1.step(action), env_2.step(action))
+
+    # the model compilation is restored outside the cache
+    assert (
+        dm_control.mujoco.wrapper.MjModel.from_xml_string.__func__.__module__
+        != "shimmy.utils.dm_control"
+    )
+
+    env_1.close()
+    env_2.close()
+
+
+def test_model_cache_interleaved(tmp_path):
+    """Tests that interleaved model caches, e.g., of the environment pool threads, restore the model compilation."""
+    original_from_xml_string = dm_control.mujoco.wrapper.MjModel.__dict__[
+        "from_xml_string"
+    ]
+    cache_1 = dm_control_model_cache(tmp_path / "cache_1")
+    cache_2 = dm_control_model_cache(tmp_path / "cache_2")
+    cache_1.__enter__()
+    cache_2.__enter__()
+    cache_1.__exit__(None, None, None)
+    dm_control.suite.load("cartpole", "balance")
+    cache_2.__exit__(None, None, None)
+
+    assert len(list((tmp_path / "cache_2").glob("*.mjb"))) == 1
+    assert (
+        dm_control.mujoco.wrapper.MjModel.__dict__["from_xml_string"]
+        is original_from_xml_string
+    )
+
+
+def test_env_pool():
+    """Tests that the environment pool reuses checked in environments and records the statistics."""
+    with shimmy.DmControlEnvPoolV0(max_idle_per_id=1) as pool:
+        env_1, obs, info = pool.checkout("dm_control/cartpole-balance-v0")
+        assert isinstance(env_1, DmControlCompatibilityV0)
+        assert obs in env_1.observation_space
+        env_1.step(env_1.action_space.sample())
+
+        env_2, _, _ = pool.checkout("dm_control/cartpole-balance-v0")
+        assert env_2 is not env_1
+        pool.checkin(env_1)
+        # the pool for the id is full, env_2 is closed
+        pool.checkin(env_2)
+        assert pool.stats()["idle"] == {"dm_control/cartpole-balance-v0": 1}
+
+        env_3, obs, info = pool.checkout("dm_control/cartpole-balance-v0")
+        assert env_3 is env_1
+        assert obs in env_3.observation_space
+        assert info["timestep.step_type"] == dm_env.StepType.FIRST
+
+        # seeded checkouts are reset with the seed
+        pool.checkin(env_3)
+        _, seeded_obs, _ = pool.checkout("dm_control/cartpole-balance-v0", seed=1)
+        expected_obs, _ = gym.make("dm_control/cartpole-balance-v0").reset(seed=1)
+        assert data_equivalence(seeded_obs, expected_obs)
+
+        with pytest.raises(ValueError):
+            pool.checkin(env_2)
+
+        stats = pool.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        assert stats["max_checkout_latency"] >= stats["mean_checkout_latency"] > 0
+        assert stats["mean_construction_time"] > 0
+
+
+def test_env_pool_reset_error(monkeypatch):
+    """Tests that an idle environment whose background reset failed is closed on checkout."""
+    closed = []
+
+    def failing_reset(self, *, seed=None, options=None):
+        raise RuntimeError("Failed to reset the environment")
+
+    monkeypatch.setattr(DmControlCompatibilityV0, "reset", failing_reset)
+    monkeypatch.setattr(
+        DmControlCompatibilityV0, "close", lambda self: closed.append(self)
+    )
+    with shimmy.DmControlEnvPoolV0() as pool:
+        pool.prefill("dm_control/cartpole-balance-v0", 1)
+        with pytest.raises(RuntimeError, match="Failed to reset"):
+            pool.checkout("dm_control/cartpole-balance-v0")
+        assert len(closed) == 1 and pool.stats()["idle"] == {}
+
+
+def test_env_pool_concurrent_prefill():
+    """Tests that concurrent prefills and checkouts don't exceed the idle environments or lose statistics."""
+    env_id = "dm_control/cartpole-balance-v0"
+    with shimmy.DmControlEnvPoolV0(max_idle_per_id=3) as pool:
+        threads = [
+            threading.Thread(target=pool.prefill, args=(env_id, 3)) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert pool.stats()["idle"] == {env_id: 3}
+
+        def checkout_checkin():
+            for _ in range(5):
+                env, _, _ = pool.checkout(env_id)
+                pool.checkin(env)
+
+        threads = [threading.Thread(target=checkout_checkin) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = pool.stats()
+        assert stats["hits"] + stats["misses"] == 20
+        assert stats["idle"][env_id] <= 3
+
+
+@pytest.mark.parametrize(
+    "env_id", ["dm_control/walker-walk-v0", "dm_control/reach_site_features-v0"]
+)
+def test_get_set_state(env_id):
+    """Tests that restoring a state snapshot continues the environment identically."""
+    env = gym.make(env_id, disable_env_checker=True).unwrapped
+    assert isinstance(env, DmControlCompatibilityV0)
+    env.reset(seed=1)
+    env.action_space.seed(1)
+    for _ in range(5):
+        env.step(env.action_space.sample())
+
+    state = env.get_state()
+    assert state.dtype == np.float64 and state.ndim == 1
+    actions = [env.action_space.sample() for _ in range(10)]
+    rollout = [env.step(action) for action in actions]
+    random_sample = env.np_random.uniform()
+
+    env.set_state(state)
+    assert data_equivalence(env.get_state(), state)
+    assert data_equivalence([env.step(action) for action in actions], rollout)
+    assert env.np_random.uniform() == random_sample
+
+    with pytest.raises(ValueError):
+        env.set_state(state[:-1])
+    env.close()
+
+
+def test_frame_skip():
+    """Tests that frame skip repeats the action, summing the rewards and stopping at the end of the episode."""
+    env = gym.make(
+        "dm_control/cartpole-balance-v0",
+        task_kwargs={"time_limit": 0.1, "random": 1},
+        frame_skip=3,
+    )
+    dm_env_ = dm_control.suite.load(
+        "cartpole", "balance", task_kwargs={"time_limit": 0.1, "random": 1}
+    )
+    assert env.unwrapped.dt == 3 * dm_env_.control_timestep()
+
+    env.reset()
+    dm_env_.reset()
+    action = np.array([0.5])
+    for num_substeps in [3, 3, 3, 1]:
+        obs, reward, terminated, truncated, info = env.step(action)
+
+        expected_reward = 0.0
+        for _ in range(num_substeps):
+            timestep = dm_env_.step(action)
+            expected_reward += timestep.reward
+        assert np.isclose(reward, expected_reward)
+        assert data_equivalence(obs, dm_obs2gym_obs(timestep.observation))
+
+    # the episode has ended on the 10th substep
+    assert truncated and not terminated
+    assert info["timestep.step_type"] == dm_env.StepType.LAST
+    env.close()
+
+
+def test_observation_keys():
+    """Tests that the observation keys filter the observation space and disable the composer observables."""
+    env = gym.make("dm_control/walker-walk-v0", observation_keys=["height"])
+    assert set(env.observation_space.keys()) == {"height"}
+    obs, _ = env.reset(seed=1)
+    assert set(obs.keys()) == {"height"} and obs in env.observation_space
+    env.close()
+
+    keys = [
+        "jaco_arm/joints_pos",
+        "jaco_arm/joints_vel",
+        "jaco_arm/jaco_hand/pinch_site_pos",
+    ]
+    env = gym.make(
+        "dm_control/lift_brick_vision-v0",
+        observation_keys=keys,
+        flatten_observation=True,
+    )
+    # the camera observable is disabled in the composer environment
+    observation_spec = env.unwrapped._env.observation_spec()
+    assert set(observation_spec.keys()) == set(keys)
+    assert env.observation_space.shape == (
+        sum(int(np.prod(spec.shape)) for spec in observation_spec.values()),
+    )
+    obs, _ = env.reset(seed=1)
+    assert obs in env.observation_space
+    env.close()
+
+    with pytest.raises(ValueError):
+        gym.make("dm_control/walker-walk-v0", observation_keys=["unknown"])
+
+
+def test_observation_dtype():
+    """Tests that the floating point observations are cast to the observation dtype."""
+    env = gym.make("dm_control/walker-walk-v0", observation_dtype=np.float32)
+    assert all(space.dtype == np.float32 for space in env.observation_space.values())
+    obs, _ = env.reset(seed=1)
+    assert all(value.dtype == np.float32 for value in obs.values())
+    assert obs in env.observation_space
+    obs, *_ = env.step(env.action_space.sample())
+    assert obs in env.observation_space
+    env.close()
+
+    # the integer specs and the spaces converted without the float dtype are unchanged
+    float_spec = BoundedArray((2,), np.float64, minimum=-1.0, maximum=1.0)
+    assert dm_spec2gym_space(float_spec, np.float32).dtype == np.float32
+    assert dm_spec2gym_space(float_spec).dtype == np.float64
+    int_spec = Array((2,), np.uint8)
+    assert dm_spec2gym_space(int_spec, np.float32).dtype == np.uint8
+
+    converter = DmObsConverter({"a": float_spec, "b": int_spec}, np.float32)
+    gym_obs = converter({"a": np.zeros(2), "b": np.zeros(2, dtype=np.uint8)})
+    assert gym_obs["a"].dtype == np.float32 and gym_obs["b"].dtype == np.uint8
+
+
+def test_timestep_info():
+    """Tests that the info is empty without the timestep info, also when merged by a vector environment."""
+    env = gym.make("dm_control/cartpole-balance-v0", timestep_info=False)
+    _, info = env.reset(seed=1)
+    assert info == {}
+    _, _, _, _, info = env.step(env.action_space.sample())
+    assert info == {}
+    env.close()
+
+    envs = gym.vector.SyncVectorEnv(
+        [
+            lambda: gym.make("dm_control/cartpole-balance-v0", timestep_info=False)
+            for _ in range(2)
+        ]
+    )
+    _, infos = envs.reset(seed=1)
+    assert infos == {}
+    _, _, _, _, infos = envs.step(envs.action_space.sample())
+    assert infos == {}
+    envs.close()
+
+
+def test_step_timer():
+    """Tests that the step timer records the time of each step phase in a rolling window."""
+    recorded = []
+    step_timer = StepTimer(window=4, callback=recorded.append)
+
+    env = gym.make("dm_control/cartpole-balance-v0", render_mode="rgb_array")
+    env.reset(seed=1)
+    env.step(env.action_space.sample())
+    assert step_timer.num_steps == 0
+
+    env.unwrapped.step_timer = step_timer
+    for _ in range(6):
+        env.step(env.action_space.sample())
+    env.close()
+
+    assert step_timer.num_steps == 6 and len(recorded) == 6
+    assert all(set(times) == set(StepTimer.phases) for times in recorded)
+    assert all(times["env"] > 0 and times["conversion"] > 0 for times in recorded)
+
+    summary = step_timer.summary()
+    assert set(summary) == set(StepTimer.phases)
+    env_times = [times["env"] for times in recorded[-4:]]
+    assert np.isclose(summary["env"]["mean"], np.mean(env_times))
+    assert summary["env"]["max"] == max(env_times)
+
+    counts, bin_edges = step_timer.histogram("conversion", bins=5)
+    assert counts.sum() == 4 and len(bin_edges) == 6
+    with pytest.raises(ValueError):
+        step_timer.histogram("unknown")
+
+    step_timer.reset()
+    assert step_timer.summary()["env"]["mean"] == 0.0
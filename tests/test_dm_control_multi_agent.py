@@ -1,7 +1,9 @@
 """Tests the multi-agent dm-control soccer environment."""
 
+import copy
 import pickle
 
+import numpy as np
 import pytest
 from dm_control.locomotion import soccer as dm_soccer
 from gymnasium.utils.env_checker import data_equivalence
@@ -9,6 +11,7 @@ from pettingzoo.test import parallel_api_test
 
 from shimmy.dm_control_multiagent_compatibility import (
     DmControlMultiAgentCompatibilityV0,
+    _unravel_ma_timestep,
 )
 from shimmy.utils.dm_control_multiagent import load_dm_control_soccer
 
@@ -181,3 +184,102 @@ def test_pickle(config):
         assert data_equivalence(infos1, infos2), "Incorrect infos"
     env1.close()
     env2.close()
+
+
+def test_timestep_info():
+    """Tests that the agent infos are empty without the timestep info."""
+    env = DmControlMultiAgentCompatibilityV0(
+        team_size=2, time_limit=10.0, timestep_info=False
+    )
+    _, infos = env.reset(seed=1)
+    assert infos == {agent: {} for agent in env.agents}
+    _, _, _, _, infos = env.step(
+        {agent: env.action_space(agent).sample() for agent in env.agents}
+    )
+    assert infos == {agent: {} for agent in env.possible_agents}
+    env.close()
+
+
+def test_persistent_step_containers():
+    """Tests that the persistent step containers are updated in place, equivalent to the new containers of every step."""
+    env = DmControlMultiAgentCompatibilityV0(
+        team_size=2, persistent_step_containers=True
+    )
+    parallel_api_test(env, num_cycles=100)
+
+    reset_observations, reset_infos = env.reset(seed=1)
+    assert reset_observations.keys() == reset_infos.keys() == set(env.possible_agents)
+
+    for _ in range(5):
+        actions = {agent: env.action_space(agent).sample() for agent in env.agents}
+        step_returns = env.step(actions)
+        for persistent, container in zip(
+            step_returns,
+            (
+                env._observations,
+                env._rewards,
+                env._terminations,
+                env._truncations,
+                env._infos,
+            ),
+        ):
+            assert persistent is container
+
+        obs, rewards, terminations, truncations, infos = step_returns
+        assert obs is reset_observations and infos is reset_infos
+        assert np.all(env.reward_array == np.array(list(rewards.values())))
+        assert np.all(env.termination_array == np.array(list(terminations.values())))
+        assert np.all(env.truncation_array == np.array(list(truncations.values())))
+
+        # the persistent containers must equal the containers of `_unravel_ma_timestep` for the same timestep
+        timestep = env._env.step(
+            [env.action_space(agent).sample() for agent in env.possible_agents]
+        )
+        expected = _unravel_ma_timestep(timestep, env.possible_agents)
+        actual = env._update_step_containers(timestep)
+        assert data_equivalence(
+            tuple(copy.deepcopy(container) for container in actual), expected
+        )
+    env.close()
+
+
+def test_batched_api():
+    """Tests that the batched API stacks the observations, rewards, terminations and truncations of the agents."""
+    env = DmControlMultiAgentCompatibilityV0(team_size=2, time_limit=1.0)
+    num_agents = len(env.possible_agents)
+    assert env.batched_observation_space is not None
+    assert env.batched_action_space is not None
+    assert env.batched_action_space.shape == (
+        num_agents,
+        *env.action_space(env.possible_agents[0]).shape,
+    )
+
+    observations, info = env.reset_batched(seed=1)
+    assert observations in env.batched_observation_space
+    assert info.keys() == {"timestep.discount", "timestep.step_type"}
+
+    env.batched_action_space.seed(1)
+    num_steps = 0
+    while env.agents:
+        observations, rewards, terminations, truncations, info = env.step_batched(
+            env.batched_action_space.sample()
+        )
+        assert observations in env.batched_observation_space
+        assert rewards.shape == terminations.shape == truncations.shape == (num_agents,)
+        num_steps += 1
+    assert np.all(terminations | truncations)
+    assert num_steps == round(1.0 / env._env.control_timestep())
+
+    # the batched buffers must equal the stacked per-agent containers of the same timestep
+    env.reset(seed=1)
+    timestep = env._env.step(env.batched_action_space.sample())
+    batched = copy.deepcopy(env._write_batched_timestep(timestep))
+    obs, rewards, terminations, truncations, _ = _unravel_ma_timestep(
+        timestep, env.possible_agents
+    )
+    for key, value in batched[0].items():
+        assert np.allclose(value, np.stack([obs[agent][key] for agent in obs]))
+    assert np.allclose(batched[1], list(rewards.values()))
+    assert np.all(batched[2] == list(terminations.values()))
+    assert np.all(batched[3] == list(truncations.values()))
+    env.close()
@@ -3,6 +3,7 @@
 # pyright: reportGeneralTypeIssues=false
 import pickle
 
+import numpy as np
 import pyspiel
 import pytest
 from gymnasium import spaces
@@ -10,6 +11,8 @@ from gymnasium.utils.env_checker import data_equivalence
 from pettingzoo.test import api_test
 
 from shimmy.openspiel_compatibility import OpenSpielCompatibilityV0
+from shimmy.openspiel_vector_env import OpenSpielVectorEnvV0
+from shimmy.utils.instrumentation import StepTimer
 
 _PASSING_GAMES = [
     "2048",
@@ -252,3 +255,252 @@ def test_pickle(game_name):
         env2.step(action2)
     env1.close()
     env2.close()
+
+
+def test_step_timer():
+    """Tests that the step timer records every step of an episode."""
+    env = OpenSpielCompatibilityV0(pyspiel.load_game("tic_tac_toe"))
+    env.step_timer = StepTimer()
+    env.reset(seed=42)
+
+    num_steps = 0
+    for agent in env.agent_iter():
+        _, _, termination, truncation, _ = env.last()
+        action = (
+            None
+            if termination or truncation
+            else env.action_space(agent).sample(env.infos[agent]["action_mask"])
+        )
+        env.step(action)
+        num_steps += 1
+    env.close()
+
+    assert env.step_timer.num_steps == num_steps
+    summary = env.step_timer.summary()
+    assert summary["env"]["max"] > 0 and summary["conversion"]["max"] > 0
+    assert summary["render"]["max"] == 0.0
+
+
+def test_lazy_observations():
+    """Tests that the observations are only computed for the observed agents, and memoized until the game state changes."""
+    env = OpenSpielCompatibilityV0(
+        game_name="goofspiel", config={"players": 4}, lazy_observations=True
+    )
+    env.reset(seed=42)
+    assert env._observations == {}
+
+    for agent in env.agent_iter():
+        observation, _, termination, truncation, info = env.last()
+        if not (termination or truncation):
+            assert env._observations.keys() == {agent}
+        assert env.observe(agent) is observation
+        assert not observation.flags.writeable
+
+        player = env.agent_name_id_mapping[agent]
+        expected = np.array(env.game_state.observation_tensor(player)).reshape(
+            env.observation_space(agent).shape
+        )
+        assert data_equivalence(observation, expected)
+
+        env.step(
+            None
+            if termination or truncation
+            else env.action_space(agent).sample(info["action_mask"])
+        )
+        if not (termination or truncation):
+            assert env._observations == {}
+
+    assert env.observations.keys() == set(env.possible_agents)
+
+
+def test_cached_spaces():
+    """Tests that the spaces are only rebuilt when the loaded game configuration changes."""
+    env = OpenSpielCompatibilityV0(game_name="leduc_poker")
+    env.reset(seed=42)
+    observation_space = env.observation_space("player_0")
+    action_space = env.action_space("player_0")
+
+    for agent in env.agent_iter():
+        _, _, termination, truncation, info = env.last()
+        env.step(
+            None
+            if termination or truncation
+            else env.action_space(agent).sample(info["action_mask"])
+        )
+        assert env.observation_space("player_0") is observation_space
+        assert env.action_space("player_0") is action_space
+
+    env.reset(seed=43)
+    assert env.observation_space("player_0") is observation_space
+    assert env.action_space("player_0") is action_space
+
+    # the seed of deep_sea is a game parameter, such that the game is reloaded with a new configuration
+    env = OpenSpielCompatibilityV0(game_name="deep_sea")
+    env.reset(seed=1)
+    action_space = env.action_space("player_0")
+    env.reset(seed=2)
+    assert env.action_space("player_0") is not action_space
+    assert env.action_space("player_0") == action_space
+
+
+def test_reused_game():
+    """Tests that the game is reused across resets, unless a game with a seed parameter is reset with a seed."""
+    env = OpenSpielCompatibilityV0(pyspiel.load_game("goofspiel", {"players": 3}))
+    game = env._env
+    env.reset(seed=42)
+    assert env._env is game
+    env.reset(seed=43)
+    assert env._env is game and len(env.agents) == 3
+
+    env = OpenSpielCompatibilityV0(game_name="deep_sea", config={"size": 3})
+    default_game = env._env
+    env.reset(seed=1)
+    seeded_game = env._env
+    assert seeded_game is not default_game
+    parameters = seeded_game.get_parameters()
+    assert parameters["size"] == 3 and parameters["seed"] == 1
+
+    # the loaded games are cached by name and config
+    env.reset(seed=2)
+    env.reset(seed=1)
+    assert env._env is seeded_game
+    env.reset()
+    assert env._env is default_game
+
+
+def test_persistent_action_masks():
+    """Tests that the persistent action masks are updated in place and equal the legal actions of every step."""
+    env = OpenSpielCompatibilityV0(game_name="chess", persistent_action_masks=True)
+    env.reset(seed=42)
+    action_mask = env.infos["player_0"]["action_mask"]
+    assert action_mask.dtype == np.int8
+
+    for _ in range(2):
+        for agent in env.agent_iter(max_iter=200):
+            _, _, termination, truncation, info = env.last()
+            assert info["action_mask"] is env._action_masks[agent]
+
+            player = env.agent_name_id_mapping[agent]
+            legal_actions = env.game_state.legal_actions(player)
+            assert np.flatnonzero(info["action_mask"]).tolist() == legal_actions
+            assert len(env._legal_actions[agent]) == len(legal_actions)
+
+            env.step(
+                None
+                if termination or truncation
+                else env.action_space(agent).sample(info["action_mask"])
+            )
+        env.reset(seed=43)
+        assert env.infos["player_0"]["action_mask"] is action_mask
+
+
+@pytest.mark.parametrize("game_name", ["tic_tac_toe", "leduc_poker", "chess"])
+def test_vector_env(game_name):
+    """Tests that the vector environment's games equal OpenSpielCompatibility environments with the same seeds and actions."""
+    num_envs = 3
+    envs = OpenSpielVectorEnvV0(game_name=game_name, num_envs=num_envs)
+    compat_envs = [
+        OpenSpielCompatibilityV0(game_name=game_name) for _ in range(num_envs)
+    ]
+    observations, info = envs.reset(seed=42)
+    for i, env in enumerate(compat_envs):
+        env.reset(seed=42 + i)
+
+    rng = np.random.default_rng(42)
+    ended = [False for _ in range(num_envs)]
+    for _ in range(20):
+        assert observations in envs.observation_space
+        actions = np.zeros(num_envs, dtype=np.int64)
+        for i, env in enumerate(compat_envs):
+            if ended[i]:
+                # the game is compared until its first episode ends
+                if np.any(info["action_mask"][i]):
+                    actions[i] = rng.choice(np.flatnonzero(info["action_mask"][i]))
+                continue
+            agent = env.agent_selection
+            assert info["current_player"][i] == env.agent_name_id_mapping[agent]
+            assert data_equivalence(observations[i], env.observe(agent))
+            assert data_equivalence(
+                info["action_mask"][i], env.infos[agent]["action_mask"]
+            )
+
+            actions[i] = rng.choice(np.flatnonzero(info["action_mask"][i]))
+            env.step(actions[i])
+            ended[i] = env.game_state.is_terminal()
+
+        observations, rewards, terminations, truncations, info = envs.step(actions)
+        assert not np.any(truncations)
+        for i in range(num_envs):
+            assert terminations[i] == envs.states[i].is_terminal()
+            if terminations[i]:
+                assert np.all(info["action_mask"][i] == 0)
+                assert data_equivalence(
+                    info["rewards"][i], np.array(envs.states[i].returns())
+                )
+    envs.close()
+
+
+def test_vector_env_autoreset():
+    """Tests that the vector environment's games are reset on the step after they ended, or with the reset mask."""
+    envs = OpenSpielVectorEnvV0(game_name="tic_tac_toe", num_envs=2, copy=False)
+    _, info = envs.reset(seed=42)
+    # the first game plays the top row, the second game the left column
+    for actions in ([0, 0], [3, 1], [1, 3], [4, 2], [2, 6]):
+        _, rewards, terminations, _, info = envs.step(np.array(actions))
+    assert np.all(terminations) and np.all(rewards == 1)
+
+    observations, rewards, terminations, _, info = envs.step(np.array([0, 0]))
+    assert not np.any(terminations) and np.all(rewards == 0)
+    assert np.all(info["action_mask"] == 1) and np.all(info["current_player"] == 0)
+    assert data_equivalence(observations[0], observations[1])
+
+    envs.step(np.array([4, 4]))
+    observations, info = envs.reset(options={"reset_mask": np.array([True, False])})
+    assert np.sum(info["action_mask"][0]) == 9 and np.sum(info["action_mask"][1]) == 8
+
+    # the documented self-play loop, passing any action for the games being reset
+    envs = OpenSpielVectorEnvV0(game_name="tic_tac_toe", num_envs=4)
+    _, info = envs.reset(seed=42)
+    for _ in range(100):
+        actions = [
+            np.random.choice(np.flatnonzero(mask)) if mask.any() else 0
+            for mask in info["action_mask"]
+        ]
+        _, _, _, _, info = envs.step(actions)
+
+    with pytest.raises(ValueError):
+        OpenSpielVectorEnvV0(game_name="goofspiel", num_envs=2)
+
+
+def test_action_masks():
+    """Tests that by default, the action masks of a step are not changed by the following steps."""
+    env = OpenSpielCompatibilityV0(game_name="tic_tac_toe")
+    env.reset(seed=42)
+    _, _, _, _, info = env.last()
+    action_mask = info["action_mask"]
+    stored_action_mask = action_mask.copy()
+
+    env.step(0)
+    env.step(1)
+    assert env.infos["player_0"]["action_mask"] is not action_mask
+    assert np.all(action_mask == stored_action_mask)
+    assert np.flatnonzero(env.infos["player_0"]["action_mask"]).tolist() == list(
+        range(2, 9)
+    )
+
+
+def test_eager_observations():
+    """Tests that by default, the observations of all agents are computed on every step and kept at the end of an episode."""
+    env = OpenSpielCompatibilityV0(game_name="tic_tac_toe")
+    env.reset(seed=42)
+    for action in (0, 3, 1, 4):
+        env.step(action)
+    assert env.observations.keys() == set(env.possible_agents)
+    observations = env.observations
+
+    # the winning move ends the game, the observations are of the last non-terminal state
+    env.step(2)
+    assert env.game_state.is_terminal()
+    assert env.observations is observations
+    for agent in env.possible_agents:
+        assert env.observe(agent) is observations[agent]
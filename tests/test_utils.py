@@ -0,0 +1,50 @@
+"""Tests the backend independent shimmy utilities."""
+
+import numpy as np
+import pytest
+from gymnasium.vector import AutoresetMode, VectorEnv
+
+from shimmy.utils.instrumentation import StepTimer
+from shimmy.utils.vector_env import check_autoreset_mode, vector_reset_args
+
+
+def test_step_timer_laps():
+    """Tests that the laps of a phase within a step are accumulated and the phases without laps are zero."""
+    step_timer = StepTimer(window=2)
+    step_timer.start()
+    step_timer.lap("conversion")
+    step_timer.lap("env")
+    step_timer.lap("conversion")
+    step_timer.stop()
+    env_time, conversion_time, render_time = step_timer.times[:, 0]
+    assert env_time > 0 and conversion_time > 0 and render_time == 0.0
+    assert step_timer.num_steps == 1
+
+
+def test_check_autoreset_mode():
+    """Tests that only the next-step and disabled autoreset modes are supported."""
+    assert check_autoreset_mode("NextStep") is AutoresetMode.NEXT_STEP
+    assert check_autoreset_mode(AutoresetMode.DISABLED) is AutoresetMode.DISABLED
+    with pytest.raises(ValueError):
+        check_autoreset_mode(AutoresetMode.SAME_STEP)
+
+
+def test_vector_reset_args():
+    """Tests the seeds and reset mask of the vector environment resets."""
+    env = VectorEnv()
+    env.num_envs = 3
+
+    seeds, reset_mask = vector_reset_args(env, 42, None)
+    assert seeds == [42, 43, 44] and reset_mask.all()
+    assert env.np_random_seed == 42
+
+    seeds, reset_mask = vector_reset_args(
+        env, [1, None, 3], {"reset_mask": [True, False, True]}
+    )
+    assert seeds == [1, None, 3]
+    assert reset_mask.dtype == np.bool_ and reset_mask.tolist() == [True, False, True]
+
+    with pytest.raises(ValueError):
+        vector_reset_args(env, [1, 2], None)
+    with pytest.raises(ValueError):
+        vector_reset_args(env, None, {"reset_mask": [True, False]})